@@ -1,18 +1,109 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context, url_for, g
+from io import BytesIO
+import argparse
+import json
 import os
 import time
-import json
 
-from predictor import predict_properties
-from retriever import retrieve_docs
-from prompt import build_llm_prompt
-from llm import generate_report
-from pdf_generator import generate_pdf
+from retriever import retriever
+from llm import generate_report_stream, clean_report, cache as llm_cache
+from pipeline import run_pipeline, prepare_prompt, finish_report, timed_stage, parse_user_inputs
+from jobs import JobQueue, QueueFull
+from pdf_generator import pdf_cache
+from startup import warmup, print_import_profile
+from batch import run_batch, read_profiles, BATCH_MAX_PROFILES
+from telemetry import (
+    Counter, Gauge, Histogram, log_event, new_request_id, set_request_id, render_metrics
+)
 
 app = Flask(__name__)
 
-# Store last generated PDF path
-LAST_PDF_PATH = None
+
+# -----------------------------
+# Request helpers
+# -----------------------------
+def bypass_llm_cache(data):
+    # Clients can force a fresh completion with {"bypass_cache": true}
+    return bool(data.get("bypass_cache", False))
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events, on_close):
+    """
+    Server-sent events response. `on_close` runs when the response is
+    closed, including a client that left before the first event (the
+    generator never starts then, so its own finally can't clean up).
+    """
+    response = Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    response.call_on_close(on_close)
+    return response
+
+
+def run_report_job(job_id, payload, stages):
+    return run_pipeline(
+        payload["user_inputs"],
+        bypass_cache=payload["bypass_cache"],
+        stages=stages,
+        report_id=job_id
+    )
+
+
+# Bounded worker pool for report generation (JOB_WORKERS / JOB_QUEUE_SIZE)
+jobs = JobQueue(run_report_job)
+
+
+def job_response(job):
+    body = job.to_dict()
+    body["request_id"] = job.payload.get("request_id")
+    body["status_url"] = url_for("job_status", job_id=job.id)
+    if job.status == "done":
+        body["download_url"] = url_for("download", job_id=job.id)
+    return body
+
+
+# -----------------------------
+# Request ids + HTTP metrics
+# -----------------------------
+HTTP_REQUESTS = Counter(
+    "golden_mile_http_requests_total", "HTTP requests", ["method", "endpoint", "status"]
+)
+HTTP_SECONDS = Histogram(
+    "golden_mile_http_request_seconds", "HTTP request latency (streamed bodies excluded)", ["endpoint"]
+)
+Gauge("golden_mile_jobs", "Report jobs by state",
+      lambda: {state: jobs.stats()[state] for state in ("queue_depth", "running")}, label="state")
+Gauge("golden_mile_streams", "Open /generate/stream and /generate/batch requests",
+      lambda: jobs.stats()["streams"])
+Gauge("golden_mile_jobs_completed_total", "Report jobs finished successfully",
+      lambda: jobs.completed, type="counter")
+Gauge("golden_mile_jobs_failed_total", "Report jobs that raised",
+      lambda: jobs.failed, type="counter")
+
+
+@app.before_request
+def assign_request_id():
+    # Honour an upstream id (load balancer / client) so logs line up across services
+    g.request_id = request.headers.get("X-Request-ID") or new_request_id()
+    g.request_start = time.perf_counter()
+    set_request_id(g.request_id)
+
+
+@app.after_request
+def record_request(response):
+    # Route pattern, not the path, so job ids don't explode label cardinality
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+    HTTP_SECONDS.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    response.headers["X-Request-ID"] = g.request_id
+    return response
+
 
 # -----------------------------
 # Routes
@@ -24,74 +115,311 @@ def home():
 
 @app.route("/generate", methods=["POST"])
 def generate():
-    global LAST_PDF_PATH
-
-    data = request.json
-
-    # --- Dynamic user inputs ---
-    user_inputs = {
-        "city": data["city"],
-        "budget": float(data["budget"]),
-        "size": float(data["size"]),
-        "metro": data.get("metro", "Yes"),  # Yes/No from UI
-        "intent": data.get("intent", "Investment")
-    }
-
-    print("User Inputs:", user_inputs)
-
-    # --- 1️⃣ ML predictions ---
-    print("Running ML predictions...")
-    recommendations = predict_properties(user_inputs)
-    print("ML done, rows:", len(recommendations))
-
-    # --- 2️⃣ Retrieve documents ---
-    print("Retrieving documents...")
-    documents = retrieve_docs(user_inputs["city"])
-    print("Docs retrieved:", len(documents))
-
-    # --- 3️⃣ Build prompt ---
-    print("Building prompt...")
-    prompt = build_llm_prompt(recommendations, documents, user_inputs)
-
-    # --- 4️⃣ LLM call ---
-    print("Calling LLM...")
-    report_text = generate_report(prompt)
-    print("LLM done")
-
-    # --- 5️⃣ Save JSON ---
-    os.makedirs("reports/json", exist_ok=True)
-    json_path = f"reports/json/report_{int(time.time())}.json"
-    with open(json_path, "w") as f:
-        json.dump({
+    """
+    Enqueue a report; poll /jobs/<id> and fetch /download/<id> when done
+    """
+    user_inputs = parse_user_inputs(request.json)
+
+    log_event("report_requested", user_inputs=user_inputs)
+
+    try:
+        job = jobs.submit({
             "user_inputs": user_inputs,
-            "recommendations": recommendations.to_dict(orient="records"),
-            "analysis": report_text
-        }, f, indent=2)
-    print(f"JSON saved: {json_path}")
-
-    # --- 6️⃣ Generate PDF ---
-    LAST_PDF_PATH = generate_pdf(report_text)
-    print("PDF generated:", LAST_PDF_PATH)
-
-    return jsonify({
-        "analysis": report_text,
-        "pdf_path": LAST_PDF_PATH,
-        "json_path": json_path
+            "bypass_cache": bypass_llm_cache(request.json),
+            "request_id": g.request_id
+        })
+    except QueueFull:
+        return jsonify({"error": "Server busy, try again shortly"}), 503
+
+    return jsonify(job_response(job)), 202
+
+
+@app.route("/generate/stream", methods=["POST"])
+def generate_stream():
+    """
+    Same pipeline as /generate, run in this request and streamed as
+    server-sent events: progress events per stage, `token` events with raw
+    LLM deltas, then a final `done` event with the cleaned analysis and the
+    download URL for the PDF.
+    """
+    user_inputs = parse_user_inputs(request.json)
+    bypass_cache = bypass_llm_cache(request.json)
+
+    log_event("report_requested", user_inputs=user_inputs, stream=True)
+
+    try:
+        release_stream = jobs.open_stream()
+    except QueueFull:
+        return jsonify({"error": "Server busy, try again shortly"}), 503
+
+    job = jobs.track({
+        "user_inputs": user_inputs,
+        "bypass_cache": bypass_cache,
+        "request_id": g.request_id
     })
+    jobs.start(job)
+    download_url = url_for("download", job_id=job.id)
+
+    def events():
+        try:
+            try:
+                recommendations, documents, prompt = prepare_prompt(user_inputs, job.stages)
+                yield sse_event("ml_done", {"rows": len(recommendations)})
+                yield sse_event("docs_retrieved", {"count": len(documents)})
+
+                parts = []
+                with timed_stage(job.stages, "llm"):
+                    for delta in generate_report_stream(prompt, bypass_cache=bypass_cache):
+                        parts.append(delta)
+                        yield sse_event("token", {"text": delta})
+
+                report_text = clean_report("".join(parts))
+
+                result = finish_report(
+                    user_inputs, recommendations, report_text, job.stages, report_id=job.id
+                )
+            except Exception as e:
+                log_event("report_failed", job_id=job.id, error=str(e))
+                jobs.finish(job, error=str(e))
+                yield sse_event("error", {"message": "Report generation failed"})
+                return
+
+            jobs.finish(job, result=result)
+            log_event("report_done", report_id=job.id, stages=dict(job.stages))
+            yield sse_event("done", {
+                "analysis": result["analysis"],
+                "job_id": job.id,
+                "json_path": result["json_path"],
+                "download_url": download_url
+            })
+        finally:
+            # Runs on client disconnect too (GeneratorExit at a yield)
+            jobs.abandon(job, "Client disconnected")
+            release_stream()
+
+    def close():
+        jobs.abandon(job, "Client disconnected")
+        release_stream()
 
+    return sse_response(events(), close)
 
-@app.route("/download")
-def download():
-    if not LAST_PDF_PATH or not os.path.exists(LAST_PDF_PATH):
-        return "No report generated yet", 404
+
+def read_request_profiles():
+    """
+    Profiles from a CSV upload (`file`), a text/csv body, or JSON
+    (a list, or {"profiles": [...], "bypass_cache": bool})
+    """
+    if "file" in request.files:
+        return read_profiles(request.files["file"].read().decode("utf-8"), "csv")
+    if request.mimetype == "text/csv":
+        return read_profiles(request.get_data(as_text=True), "csv")
+    return read_profiles(request.get_data(as_text=True), "json")
+
+
+@app.route("/generate/batch", methods=["POST"])
+def generate_batch():
+    """
+    Reports for many client profiles in one call, streamed as server-sent
+    events: `batch_started` with a job id per profile, then
+    `profile_done` / `profile_failed` as each completes, then `done`.
+    Finished reports download from /download/<job_id> like single ones.
+    """
+    try:
+        profiles = read_request_profiles()
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid profiles: {e}"}), 400
+    if not profiles:
+        return jsonify({"error": "No profiles given"}), 400
+    if len(profiles) > BATCH_MAX_PROFILES:
+        return jsonify({"error": f"At most {BATCH_MAX_PROFILES} profiles per batch"}), 413
+
+    body = request.get_json(silent=True)
+    bypass_cache = (
+        bypass_llm_cache(body) if isinstance(body, dict)
+        else request.args.get("bypass_cache") == "1"
+    )
+
+    log_event("batch_requested", profiles=len(profiles))
+
+    # One stream slot per batch; its LLM calls are bounded by the shared batch pool
+    try:
+        release_stream = jobs.open_stream()
+    except QueueFull:
+        return jsonify({"error": "Server busy, try again shortly"}), 503
+
+    batch_jobs = [
+        jobs.track({"user_inputs": p, "bypass_cache": bypass_cache, "request_id": g.request_id})
+        for p in profiles
+    ]
+    for job in batch_jobs:
+        jobs.start(job)
+    download_urls = [url_for("download", job_id=job.id) for job in batch_jobs]
+
+    def events():
+        results = run_batch(profiles, bypass_cache, report_ids=[job.id for job in batch_jobs])
+        try:
+            yield sse_event("batch_started", {
+                "count": len(profiles),
+                "job_ids": [job.id for job in batch_jobs]
+            })
+
+            done = 0
+            start = time.perf_counter()
+            try:
+                for result in results:
+                    i = result["index"]
+                    job = batch_jobs[i]
+                    job.stages.update(result["stages"])
+
+                    if result["status"] == "failed":
+                        jobs.finish(job, error=result["error"])
+                        yield sse_event("profile_failed", {
+                            "index": i, "job_id": job.id, "message": "Report generation failed"
+                        })
+                        continue
+
+                    jobs.finish(job, result={"analysis": result["analysis"], "json_path": result["json_path"]})
+                    done += 1
+                    yield sse_event("profile_done", {
+                        "index": i,
+                        "job_id": job.id,
+                        "user_inputs": profiles[i],
+                        "analysis": result["analysis"],
+                        "json_path": result["json_path"],
+                        "download_url": download_urls[i]
+                    })
+            except Exception as e:
+                # run_batch raised (e.g. shared scoring / retrieval): the rest cannot finish
+                log_event("batch_failed", error=str(e))
+                for job in batch_jobs:
+                    jobs.abandon(job, str(e))
+                yield sse_event("error", {"message": "Batch report generation failed"})
+                return
+
+            yield sse_event("done", {
+                "completed": done,
+                "failed": len(profiles) - done,
+                "seconds": round(time.perf_counter() - start, 3)
+            })
+        finally:
+            # Client disconnect (GeneratorExit) or a failed batch: cancel the
+            # queued profiles and fail the jobs that never finished
+            results.close()
+            for job in batch_jobs:
+                jobs.abandon(job, "Batch stopped before the report finished")
+            release_stream()
+
+    def close():
+        for job in batch_jobs:
+            jobs.abandon(job, "Batch stopped before the report finished")
+        release_stream()
+
+    return sse_response(events(), close)
+
+
+@app.route("/jobs/stats")
+def job_stats():
+    return jsonify(jobs.stats())
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job_response(job))
+
+
+@app.route("/download/<job_id>")
+def download(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return "Unknown report", 404
+    if job.status != "done":
+        return f"Report is {job.status}", 409
+
+    # Rendered on first download, then served from the in-memory cache
+    pdf_bytes = pdf_cache.get_or_render(job.id, job.result["analysis"])
 
     return send_file(
-        LAST_PDF_PATH,
+        BytesIO(pdf_bytes),
         as_attachment=True,
         download_name="Golden_Mile_Report.pdf",
         mimetype="application/pdf"
     )
 
 
+@app.route("/pdf/cache/stats")
+def pdf_cache_stats():
+    return jsonify(pdf_cache.stats())
+
+
+@app.route("/retriever/stats")
+def retriever_stats():
+    return jsonify(retriever.stats())
+
+
+@app.route("/llm/cache/stats")
+def llm_cache_stats():
+    return jsonify(llm_cache.stats())
+
+
+@app.route("/metrics")
+def metrics():
+    """
+    Prometheus text format: stage / HTTP latency histograms, LLM token and
+    cache counters, job gauges
+    """
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+# -----------------------------
+# Liveness / readiness / warm-up
+# -----------------------------
+@app.route("/healthz")
+def healthz():
+    """
+    Liveness: the process is up and serving, nothing is loaded here
+    """
+    return jsonify({"status": "alive"})
+
+
+@app.route("/readyz")
+def readyz():
+    """
+    Readiness: model, vector store, encoder and LLM client all loaded
+    """
+    status = warmup.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@app.route("/warmup", methods=["POST"])
+def warmup_route():
+    """
+    Preload components now (all, or {"components": ["model", ...]})
+    """
+    names = (request.get_json(silent=True) or {}).get("components")
+    unknown = [name for name in names or [] if name not in warmup.components]
+    if unknown:
+        return jsonify({"error": f"Unknown components: {unknown}"}), 400
+
+    status = warmup.run(names)
+    return jsonify(status), 200 if status["ready"] else 503
+
+
 if __name__ == "__main__":
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Golden Mile web server")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--warmup", action="store_true",
+                        help="preload model, index, encoder and LLM client in the background after startup")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="print per-package import time of app.py and exit")
+    args = parser.parse_args()
+
+    if args.profile_imports:
+        print_import_profile("app")
+    else:
+        # With the debug reloader only the child process serves requests
+        if args.warmup and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            warmup.start()
+        app.run(debug=True, port=args.port)
@@ -0,0 +1,187 @@
+import argparse
+import contextvars
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from predictor import predict_properties_batch
+from retriever import retrieve_docs
+from prompt import build_llm_prompt
+from llm import generate_report
+from pipeline import parse_user_inputs, finish_report, timed_stage, run_concurrently
+from telemetry import log_event, span
+
+# -----------------------------
+# Batch reports (many client profiles per call)
+# -----------------------------
+# All profiles are scored in one pass over the listings, documents are
+# retrieved once per distinct city, and the LLM calls (the slow part) run
+# on one pool shared by every batch in the process, so concurrent batch
+# requests never exceed BATCH_LLM_CONCURRENCY calls between them. Results
+# are yielded per profile as they complete.
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", 4))
+BATCH_MAX_PROFILES = int(os.getenv("BATCH_MAX_PROFILES", 200))
+
+_llm_pool = None
+_llm_pool_lock = threading.Lock()
+
+
+def get_llm_pool():
+    global _llm_pool
+    with _llm_pool_lock:
+        if _llm_pool is None:
+            _llm_pool = ThreadPoolExecutor(
+                max_workers=BATCH_LLM_CONCURRENCY, thread_name_prefix="batch-llm"
+            )
+    return _llm_pool
+
+
+def read_profiles(text, fmt="json"):
+    """
+    User inputs from CSV text (one profile per row, same columns as the
+    /generate body) or JSON (a list, or {"profiles": [...]})
+    """
+    if fmt == "csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+    else:
+        data = json.loads(text)
+        rows = data["profiles"] if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise ValueError("expected a list of profiles")
+
+    profiles = []
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError(f"Profile {i}: expected an object, got {type(row).__name__}")
+        # Empty CSV cells fall back to the /generate defaults
+        row = {k: v for k, v in row.items() if v not in ("", None)}
+        try:
+            profiles.append(parse_user_inputs(row))
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Profile {i}: invalid or missing {e}") from None
+    return profiles
+
+
+def _city_key(city):
+    return city.strip().lower()
+
+
+def retrieve_by_city(cities):
+    """
+    Documents per city key, one retrieval per distinct city. Each is a
+    `retrieve` span with the city as a log field, never a metric label
+    (client-supplied strings would grow the series without bound).
+    """
+    documents = {}
+    for key, city in cities.items():
+        with span("retrieve", city=city):
+            documents[key] = retrieve_docs(city)
+    return documents
+
+
+def run_batch(profiles, bypass_cache=False, report_ids=None, pool=None):
+    """
+    Yield one result per profile in completion order:
+    {"index", "status": "done" | "failed", "report_id", "stages",
+     "analysis", "json_path"} or {..., "error"}
+
+    Profiles run on `pool` (default: the shared batch LLM pool).
+    """
+    batch_id = uuid.uuid4().hex[:12]
+    report_ids = report_ids or [f"{batch_id}_{i}" for i in range(len(profiles))]
+
+    # --- 1️⃣ Score every profile + 2️⃣ retrieve once per city (together) ---
+    cities = {}
+    for profile in profiles:
+        cities.setdefault(_city_key(profile["city"]), profile["city"])
+
+    shared = {}
+    with timed_stage(shared, "batch_predict_and_retrieve") as fields:
+        # Per-task timings go to the span logs / metrics, not each profile's stages
+        results = run_concurrently({}, {
+            "batch_predict": (predict_properties_batch, profiles),
+            "batch_retrieve": (retrieve_by_city, cities)
+        })
+        fields.update(profiles=len(profiles), cities=len(cities))
+
+    recommendations = results["batch_predict"]
+    documents = results["batch_retrieve"]
+
+    # --- 3️⃣ Prompt → 4️⃣ LLM → 5️⃣ JSON, per profile ---
+    def run_one(i):
+        profile = profiles[i]
+        stages = dict(shared)
+        with timed_stage(stages, "prompt"):
+            prompt = build_llm_prompt(
+                recommendations[i], documents[_city_key(profile["city"])], profile
+            )
+        with timed_stage(stages, "llm"):
+            report_text = generate_report(prompt, bypass_cache=bypass_cache)
+        result = finish_report(profile, recommendations[i], report_text, stages, report_ids[i])
+        return stages, result
+
+    start = time.perf_counter()
+    pool = pool or get_llm_pool()
+    futures = {}
+    try:
+        # Each profile runs in a copy of the caller's context (request id)
+        for i in range(len(profiles)):
+            futures[pool.submit(contextvars.copy_context().run, run_one, i)] = i
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                stages, result = future.result()
+            except Exception as e:
+                log_event("batch_profile_failed", index=i, report_id=report_ids[i], error=str(e))
+                yield {"index": i, "status": "failed", "report_id": report_ids[i],
+                       "stages": dict(shared), "error": str(e)}
+                continue
+            yield {"index": i, "status": "done", "report_id": report_ids[i],
+                   "stages": stages, **result}
+    finally:
+        # A consumer that stops early (client disconnect) cancels its queued
+        # profiles; the pool itself is shared and stays up
+        for future in futures:
+            future.cancel()
+
+    log_event("batch_done", batch_id=batch_id, profiles=len(profiles),
+              seconds=round(time.perf_counter() - start, 3))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate reports for many client profiles")
+    parser.add_argument("profiles", help="CSV or JSON file of user inputs ('-' reads JSON from stdin)")
+    parser.add_argument("--out", default=None,
+                        help="JSON-lines results path (default reports/batch/batch_<timestamp>.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_LLM_CONCURRENCY,
+                        help="concurrent LLM calls")
+    parser.add_argument("--bypass-cache", action="store_true", help="skip the LLM response cache")
+    args = parser.parse_args()
+
+    if args.profiles == "-":
+        profiles = read_profiles(sys.stdin.read())
+    else:
+        with open(args.profiles) as f:
+            profiles = read_profiles(f.read(), "csv" if args.profiles.endswith(".csv") else "json")
+
+    if len(profiles) > BATCH_MAX_PROFILES:
+        sys.exit(f"{len(profiles)} profiles, BATCH_MAX_PROFILES is {BATCH_MAX_PROFILES}")
+
+    out = args.out or f"reports/batch/batch_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+
+    failed = 0
+    pool = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="batch-llm")
+    with open(out, "w") as f:
+        for result in run_batch(profiles, args.bypass_cache, pool=pool):
+            f.write(json.dumps({"user_inputs": profiles[result["index"]], **result}) + "\n")
+            f.flush()
+            failed += result["status"] == "failed"
+
+    print(f"Batch done: {len(profiles) - failed}/{len(profiles)} reports → {out}")
@@ -0,0 +1,78 @@
+"""
+City-scoped search latency and recall per FAISS index spec.
+
+Builds each spec over a synthetic normalized corpus with the same helpers
+as build_vector_index.py, then reports per-query latency and recall@k
+against the exact (Flat) city-scoped result for the smallest city.
+
+Run from the repo root (corpus size is optional, default 1M):
+    python benchmarks/bench_ann_index.py [n_vectors]
+"""
+import os
+import sys
+import time
+import numpy as np
+import faiss
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from ann_index import build_index, default_search_params, index_kind, search_parameters
+
+DIM = 384
+K = 5
+QUERIES = 200
+SPECS = ["Flat", "IVF4096,Flat", "HNSW32", "IVF4096,PQ48"]  # nlist sized for ~1M vectors
+CITY_SHARES = {"Hyderabad": 0.80, "Bengaluru": 0.15, "Pune": 0.05}
+
+
+def make_corpus(n, rng, clusters=1000):
+    # Clustered rather than uniform: closer to real embedding distributions
+    centers = rng.standard_normal((clusters, DIM)).astype("float32")
+    vecs = centers[rng.integers(0, clusters, n)]
+    vecs += 0.5 * rng.standard_normal((n, DIM)).astype("float32")
+    faiss.normalize_L2(vecs)
+    cities = rng.choice(list(CITY_SHARES), size=n, p=list(CITY_SHARES.values()))
+    return vecs, cities
+
+
+def search(index, kind, params, selector, queries):
+    latencies = []
+    results = []
+    for q in queries:
+        q = q.reshape(1, -1)
+        start = time.perf_counter()
+        _, idxs = index.search(q, K, params=search_parameters(index, kind, params, selector))
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(set(idxs[0][idxs[0] >= 0].tolist()))
+    return latencies, results
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+    city = "Pune"
+
+    vecs, cities = make_corpus(n, rng)
+    selector = faiss.IDSelectorBatch(np.flatnonzero(cities == city).astype("int64"))
+    queries = vecs[rng.choice(n, QUERIES, replace=False)]
+
+    truth = None
+    print(f"{n} vectors, {QUERIES} queries, k={K}, city share {CITY_SHARES[city]:.0%}")
+    print(f"{'spec':>14} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7}")
+    for spec in SPECS:
+        start = time.perf_counter()
+        index = build_index(spec, vecs, batch_size=65536)
+        build_sec = time.perf_counter() - start
+
+        kind = index_kind(index)
+        latencies, results = search(index, kind, default_search_params(index), selector, queries)
+        if truth is None:
+            truth = results  # Flat runs first: exact reference
+        recall = np.mean([len(r & t) / max(len(t), 1) for r, t in zip(results, truth)])
+
+        print(
+            f"{spec:>14} {build_sec:>8.1f} "
+            f"{np.percentile(latencies, 50):>8.3f} "
+            f"{np.percentile(latencies, 95):>8.3f} "
+            f"{recall:>7.2%}"
+        )
+        del index
@@ -0,0 +1,112 @@
+"""
+Whole-table vs. chunked scoring of a large listings feed.
+
+Writes a synthetic feed (the listings resampled with replacement up to
+--rows rows), then scores one request on it in a fresh process per mode
+and reports wall time and peak RSS:
+    full      pd.read_csv + one model call + budget mask (predict_properties)
+    chunked   scoring.top_candidates, in-process
+    pool      scoring.top_candidates over --workers processes
+"peak MB" is the scoring process; for the pool, "worker MB" is the
+largest worker and "total MB" estimates parent + workers.
+
+Chunked peak memory stays flat as --rows grows, while the full table
+grows with it. On small feeds the saving is small, because the
+interpreter, pandas and the model (~250 MB) dominate. The pool costs
+more memory in total than in-process chunking (each worker holds the
+model and up to two chunks); it only buys throughput on several cores.
+One run (1 core, --chunk-rows 100000):
+
+      rows   full MB   chunked MB   pool total MB (2 workers)
+      300k       298          268           685
+        1M       465          278           721
+        3M       913          275           721
+
+Run from the repo root:
+    python benchmarks/bench_chunked_scoring.py --rows 1000000,3000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+SIZE = 1234         # off the price grid (and the feed has no grid anyway)
+BUDGET_CR = 3.0
+
+
+def write_feed(path, rows, chunk_rows=500_000):
+    from predictor import DATA_PATH
+    df = pd.read_csv(DATA_PATH)
+    rng = np.random.default_rng(42)
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        df.iloc[rng.integers(0, len(df), n)].to_csv(
+            path, mode="a" if start else "w", header=not start, index=False
+        )
+
+
+def run_mode(mode, path, workers, chunk_rows):
+    """
+    Runs in a child process; prints {"seconds", "rows", "peak_rss_mb"}
+    """
+    import predictor
+    from scoring import top_candidates
+
+    predictor.get_model()   # model load stays out of the numbers
+    start = time.perf_counter()
+    if mode == "full":
+        df = pd.read_csv(path)
+        prices = predictor.predict_price_per_sqft_batch(predictor.build_model_inputs(df, SIZE))
+        result = df[prices * SIZE / 1e7 <= BUDGET_CR]
+    else:
+        result = top_candidates(SIZE, BUDGET_CR, path=path, chunk_rows=chunk_rows,
+                                workers=workers if mode == "pool" else 0)
+    seconds = time.perf_counter() - start
+
+    # ru_maxrss is KB on Linux; RUSAGE_CHILDREN is the largest pool worker
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    worker = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024 if mode == "pool" else 0.0
+    print(json.dumps({"seconds": seconds, "rows": len(result), "peak_rss_mb": peak,
+                      "worker_rss_mb": worker, "total_rss_mb": peak + workers * worker}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Whole-table vs. chunked listings scoring")
+    parser.add_argument("--rows", default="1000000", help="comma-separated feed sizes")
+    parser.add_argument("--modes", default="full,chunked,pool")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--run-mode", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        run_mode(args.run_mode[0], args.run_mode[1], args.workers, args.chunk_rows)
+        sys.exit(0)
+
+    env = dict(os.environ, LOG_SPANS="0")
+    print(f"{'rows':>10} {'mode':>8} {'seconds':>9} {'peak MB':>9} {'worker MB':>10} "
+          f"{'total MB':>9} {'result rows':>12}")
+    for rows in [int(r) for r in args.rows.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "listings.csv")
+            write_feed(path, rows)
+            for mode in args.modes.split(","):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--run-mode", mode, path,
+                     "--workers", str(args.workers), "--chunk-rows", str(args.chunk_rows)],
+                    capture_output=True, text=True, env=env
+                )
+                if out.returncode:
+                    print(f"{rows:>10} {mode:>8}  [Warning] failed: {out.stderr.strip()[-200:]}")
+                    continue
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{rows:>10} {mode:>8} {r['seconds']:>9.2f} {r['peak_rss_mb']:>9.0f} "
+                      f"{r['worker_rss_mb']:>10.0f} {r['total_rss_mb']:>9.0f} {r['rows']:>12}")
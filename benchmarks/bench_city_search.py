@@ -0,0 +1,82 @@
+"""
+City-scoped FAISS search vs. the old over-fetch-then-filter approach.
+
+Builds synthetic normalized corpora of increasing size where the requested
+city holds a small share of the vectors, then reports per-query latency and
+hit completeness (hits returned / k) for both strategies.
+
+Run from the repo root:
+    python benchmarks/bench_city_search.py
+"""
+import time
+import numpy as np
+import faiss
+
+DIM = 384
+K = 5
+QUERIES = 50
+CORPUS_SIZES = [1_000, 10_000, 100_000, 500_000]
+CITY_SHARES = {"Hyderabad": 0.80, "Bengaluru": 0.15, "Pune": 0.05}
+
+
+def make_corpus(n, rng):
+    vecs = rng.standard_normal((n, DIM)).astype("float32")
+    faiss.normalize_L2(vecs)
+    cities = rng.choice(
+        list(CITY_SHARES), size=n, p=list(CITY_SHARES.values())
+    )
+    return vecs, cities
+
+
+def overfetch_filter(index, cities, query, city):
+    # Previous retrieve_docs behaviour: search k*3 globally, then filter
+    _, idxs = index.search(query, min(K * 3, index.ntotal))
+    return [i for i in idxs[0] if i >= 0 and cities[i] == city][:K]
+
+
+def city_scoped(index, selector, n_city, query):
+    params = faiss.SearchParameters(sel=selector)
+    _, idxs = index.search(query, min(K, n_city), params=params)
+    return [i for i in idxs[0] if i >= 0]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    city = "Pune"  # smallest share: worst case for over-fetch
+
+    print(f"{'corpus':>9} {'method':>12} {'p50 ms':>8} {'p95 ms':>8} {'complete':>9}")
+    for n in CORPUS_SIZES:
+        vecs, cities = make_corpus(n, rng)
+        index = faiss.IndexFlatIP(DIM)
+        index.add(vecs)
+
+        ids = np.flatnonzero(cities == city).astype("int64")
+        selector = faiss.IDSelectorBatch(ids)
+
+        queries = rng.standard_normal((QUERIES, DIM)).astype("float32")
+        faiss.normalize_L2(queries)
+
+        for name in ("overfetch", "city_scoped"):
+            latencies = []
+            hits = []
+            for q in queries:
+                q = q.reshape(1, -1)
+                if name == "overfetch":
+                    docs, ms = timed(lambda: overfetch_filter(index, cities, q, city))
+                else:
+                    docs, ms = timed(lambda: city_scoped(index, selector, len(ids), q))
+                latencies.append(ms)
+                hits.append(len(docs) / K)
+
+            print(
+                f"{n:>9} {name:>12} "
+                f"{np.percentile(latencies, 50):>8.3f} "
+                f"{np.percentile(latencies, 95):>8.3f} "
+                f"{np.mean(hits):>9.2%}"
+            )
@@ -0,0 +1,61 @@
+"""
+Compiled NumPy price model vs. the pickled sklearn / XGBoost model.
+
+For every model in models/ (each compiled on the fly), checks parity on
+the listings table, then reports per-call latency for batch sizes from 1
+to 100k rows (sampled with replacement from the encoded listings).
+
+Run from the repo root:
+    python benchmarks/bench_compiled_model.py
+"""
+import glob
+import os
+import sys
+import time
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from compiled_model import CompiledModel, check_parity, compile_model
+from predictor import DATA_PATH, build_model_inputs
+
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+
+
+def timed(fn, X, budget_sec=1.0, max_repeats=200):
+    """
+    Median milliseconds per call, repeating small batches for stability
+    """
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_repeats and (len(times) < 3 or time.perf_counter() - start < budget_sec):
+        t = time.perf_counter()
+        fn(X)
+        times.append((time.perf_counter() - t) * 1000)
+    return float(np.median(times))
+
+
+if __name__ == "__main__":
+    df = pd.read_csv(DATA_PATH)
+    frame = build_model_inputs(df, df["Size_sqft"])
+    rng = np.random.default_rng(42)
+
+    for path in sorted(glob.glob("models/*.pkl")):
+        model = joblib.load(path)
+        try:
+            compiled = CompiledModel(compile_model(model))
+        except ValueError as e:
+            print(f"\n{path}: skipped ({e})")
+            continue
+
+        X = pd.get_dummies(frame).reindex(columns=model.feature_names_in_, fill_value=0)
+        diff = check_parity(model, compiled, X)
+        print(f"\n{path} ({type(model).__name__}), parity max rel diff {diff:.1e}")
+        print(f"{'batch':>8} {'original ms':>12} {'compiled ms':>12} {'speedup':>8}")
+
+        for n in BATCH_SIZES:
+            batch = X.iloc[rng.integers(0, len(X), n)]
+            original = timed(model.predict, batch)
+            fast = timed(compiled.predict, batch)
+            print(f"{n:>8} {original:>12.3f} {fast:>12.3f} {original / fast:>7.1f}x")
@@ -0,0 +1,47 @@
+"""
+PDF extraction throughput (pages/sec) vs. worker count.
+
+Runs src/pdf_loader.extract_pdfs over every PDF under data/pdfs (or the
+directory given with --pdf-dir) for each worker count and checks that
+the extracted text matches the serial run.
+
+Run from the repo root:
+    python benchmarks/bench_pdf_extraction.py --workers 1 2 4 8
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pdf_loader import extract_pdfs, plan_tasks, PAGES_PER_TASK  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdf-dir", default="data/pdfs")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument("--pages-per-task", type=int, default=PAGES_PER_TASK)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.pdf_dir, "**", "*.pdf"), recursive=True))
+    _, page_counts = plan_tasks(paths, args.pages_per_task)
+    total_pages = sum(page_counts.values())
+    print(f"{len(paths)} PDFs, {total_pages} pages, {os.cpu_count()} CPUs")
+
+    baseline = None
+    print(f"{'workers':>8} {'seconds':>8} {'pages/sec':>10} {'speedup':>8}")
+    for workers in sorted(set(args.workers)):
+        start = time.perf_counter()
+        texts = dict(extract_pdfs(paths, workers, args.pages_per_task))
+        elapsed = time.perf_counter() - start
+
+        if baseline is None:
+            baseline = (texts, elapsed)
+        elif texts != baseline[0]:
+            print(f"[Warning] output with {workers} workers differs from the first run")
+
+        print(f"{workers:>8} {elapsed:>8.2f} {total_pages / elapsed:>10.1f} "
+              f"{baseline[1] / elapsed:>7.2f}x")
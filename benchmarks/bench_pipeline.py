@@ -0,0 +1,260 @@
+"""
+End-to-end latency of the report pipeline, driven through the Flask
+test client with the LLM served by benchmarks/fake_openai.py.
+
+Every request goes POST /generate → poll /jobs/<id> → GET /download/<id>
+over a matrix of cities x budgets x sizes (on- and off-grid sizes).
+Per-stage times come from the job record (queue wait, predict, retrieve,
+prompt, llm, save_json) plus the PDF render measured around /download.
+Reports p50/p95/p99 per stage and end to end, and throughput for each
+number of concurrent clients, then writes everything to a JSON file.
+Pass --compare with an earlier file to flag p95 regressions.
+
+Run from the repo root:
+    python benchmarks/bench_pipeline.py --llm-latency 0.2 --concurrency 1,4,8
+    python benchmarks/bench_pipeline.py --compare reports/benchmarks/pipeline_<ts>.json
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from fake_openai import start_server
+
+CITIES = ["Hyderabad", "Bengaluru", "Pune"]
+BUDGETS = [1.0, 2.5, 5.0]
+SIZES = [900, 1234, 2000]   # 1234 is off the price grid, so the model runs
+PERCENTILES = [50, 95, 99]
+POLL_SEC = 0.005
+
+
+def request_matrix():
+    return [
+        {"city": city, "budget": budget, "size": size, "intent": "Investment"}
+        for city, budget, size in itertools.product(CITIES, BUDGETS, SIZES)
+    ]
+
+
+def run_request(client, payload):
+    """
+    One full report: submit, wait for the job, download the PDF.
+    Returns {stage: seconds} including "end_to_end" and "client".
+    """
+    start = time.perf_counter()
+    response = client.post("/generate", json=payload)
+    if response.status_code != 202:
+        raise RuntimeError(f"/generate returned {response.status_code}: {response.get_data(as_text=True)}")
+    status_url = response.json["status_url"]
+
+    while True:
+        job = client.get(status_url).json
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(POLL_SEC)
+    if job["status"] == "failed":
+        raise RuntimeError(f"Job failed: {job['error']}")
+
+    pdf_start = time.perf_counter()
+    pdf = client.get(job["download_url"])
+    pdf_time = time.perf_counter() - pdf_start
+    if pdf.status_code != 200:
+        raise RuntimeError(f"/download returned {pdf.status_code}")
+
+    timings = dict(job["stages"])
+    timings["wait"] = job["wait_time"]
+    timings["pdf"] = pdf_time
+    # Server-side job time + render, without the polling granularity
+    timings["end_to_end"] = job["finished_at"] - job["created_at"] + pdf_time
+    timings["client"] = time.perf_counter() - start
+    return timings
+
+
+def run_level(app, payloads, clients, requests_per_client):
+    """
+    `clients` threads, each with its own test client, cycling through the
+    matrix. Returns (per-request timings, wall seconds, errors).
+    """
+    samples = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        client = app.test_client()
+        for i in range(requests_per_client):
+            payload = payloads[(offset + i) % len(payloads)]
+            try:
+                timings = run_request(client, payload)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                samples.append(timings)
+
+    threads = [
+        threading.Thread(target=worker, args=(n * requests_per_client,))
+        for n in range(clients)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - start, errors
+
+
+def summarize(samples):
+    """
+    {stage: {p50, p95, p99, mean, count}} in milliseconds
+    """
+    stages = sorted({name for s in samples for name in s})
+    summary = {}
+    for name in stages:
+        values = np.array([s[name] for s in samples if s.get(name) is not None]) * 1000
+        if len(values) == 0:
+            continue
+        stats = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+        stats.update(mean=float(values.mean()), count=int(len(values)))
+        summary[name] = stats
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_level(level):
+    print(f"\n🔹 {level['clients']} client(s): {level['requests']} requests in "
+          f"{level['wall_sec']:.2f}s → {level['throughput_rps']:.2f} req/s"
+          + (f", {level['errors']} errors" if level["errors"] else ""))
+    print(f"   {'stage':<22} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in level["stages"].items():
+        print(f"   {name:<22} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f}")
+
+
+def compare(result, baseline_path, tolerance, min_delta_ms):
+    """
+    Print stages whose p95 grew by more than `tolerance` (and at least
+    `min_delta_ms`, so sub-millisecond jitter doesn't count) vs. the
+    baseline; returns the number of regressions
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {level["clients"]: level for level in baseline["levels"]}
+
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    for level in result["levels"]:
+        old = before.get(level["clients"])
+        if old is None:
+            continue
+        for name, stats in level["stages"].items():
+            if name not in old["stages"]:
+                continue
+            old_p95 = old["stages"][name]["p95"]
+            ratio = stats["p95"] / max(old_p95, 1e-9)
+            if ratio > 1 + tolerance and stats["p95"] - old_p95 >= min_delta_ms:
+                regressions += 1
+                print(f"   [Regression] {level['clients']} client(s) {name}: p95 "
+                      f"{old_p95:.1f} → {stats['p95']:.1f} ms ({ratio:.2f}x)")
+    if not regressions:
+        print(f"   no p95 regressions above {tolerance:.0%}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end /generate pipeline benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.2,
+                        help="fake LLM seconds before the completion")
+    parser.add_argument("--concurrency", default="1,4,8",
+                        help="comma-separated numbers of concurrent clients")
+    parser.add_argument("--requests", type=int, default=27,
+                        help="requests per client at each concurrency level")
+    parser.add_argument("--llm-cache", action="store_true",
+                        help="let completions hit the LLM cache (bypassed by default)")
+    parser.add_argument("--out", default=None,
+                        help="JSON output path (default reports/benchmarks/pipeline_<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed p95 growth before a stage counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="ignore p95 growth smaller than this many ms")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's own logging")
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.llm_latency)
+
+    # Must be set before the app (llm.py / llm_cache.py) is imported
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["LLM_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_llm_cache_")
+    if not args.llm_cache:
+        os.environ["LLM_CACHE_BYPASS"] = "1"
+
+    from app import app, jobs
+    from startup import warmup
+
+    logs = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    payloads = request_matrix()
+
+    with logs:
+        warmup.run()
+        run_level(app, payloads[:3], 1, 3)   # first-request costs stay out of the numbers
+
+    result = {
+        "benchmark": "pipeline",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "llm_latency_sec": args.llm_latency,
+            "llm_cache": args.llm_cache,
+            "requests_per_client": args.requests,
+            "job_workers": jobs.workers,
+            "matrix": {"cities": CITIES, "budgets": BUDGETS, "sizes": SIZES}
+        },
+        "levels": []
+    }
+
+    for clients in [int(c) for c in args.concurrency.split(",")]:
+        with logs:
+            samples, wall, errors = run_level(app, payloads, clients, args.requests)
+        level = {
+            "clients": clients,
+            "requests": len(samples),
+            "errors": len(errors),
+            "wall_sec": wall,
+            "throughput_rps": len(samples) / wall if wall else None,
+            "stages": summarize(samples)
+        }
+        result["levels"].append(level)
+        print_level(level)
+        for error in sorted(set(errors))[:5]:
+            print(f"   [Warning] {error}")
+
+    server.shutdown()
+
+    out = args.out or f"reports/benchmarks/pipeline_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults saved: {out}")
+
+    if args.compare:
+        sys.exit(1 if compare(result, args.compare, args.tolerance, args.min_delta_ms) else 0)
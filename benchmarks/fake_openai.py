@@ -0,0 +1,141 @@
+"""
+Local fake OpenAI-compatible chat completions server.
+
+Serves POST /v1/chat/completions (plain and stream=True) with a canned
+advisory report, after a configurable latency. Point the app at it with:
+
+    python benchmarks/fake_openai.py --port 8011 --latency 0.5 &
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 OPENAI_API_KEY=fake python app.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_REPORT = (
+    "### Advisory Report\n\n"
+    "**Budget Feasibility:** The budget is feasible for the listed localities.\n\n"
+    "### Best-Fit Localities\n"
+    "- Strong demand due to employment hubs\n"
+    "- Good metro and road connectivity\n\n"
+    "### Final Recommendation\n"
+    "Prioritize metro proximity and tenant demand for stable returns.\n"
+)
+
+
+def make_handler(latency=0.0, token_delay=0.0, text=CANNED_REPORT):
+    """
+    Request handler class with the given timing behaviour.
+
+    latency: seconds before the first byte of the completion
+    token_delay: seconds between streamed chunks
+    """
+    words = text.split(" ")
+    tokens = [w if i == len(words) - 1 else w + " " for i, w in enumerate(words)]
+
+    class FakeOpenAIHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            if not self.path.endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            model = body.get("model", "fake-model")
+            prompt_tokens = sum(
+                len(m.get("content", "").split()) for m in body.get("messages", [])
+            )
+
+            time.sleep(latency)
+
+            if body.get("stream"):
+                self._stream(model)
+                return
+
+            self._send_json(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": prompt_tokens + len(tokens)
+                }
+            })
+
+        def _stream(self, model):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            for i, token in enumerate(tokens):
+                if i and token_delay:
+                    time.sleep(token_delay)
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"content": token},
+                        "finish_reason": None
+                    }]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return FakeOpenAIHandler
+
+
+def start_server(port=0, latency=0.0, token_delay=0.0):
+    """
+    Start the fake server on a background thread.
+    Returns (server, base_url); call server.shutdown() when done.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, token_delay))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds before the first byte of each completion")
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="seconds between streamed chunks")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", args.port), make_handler(args.latency, args.token_delay)
+    )
+    print(f"Fake OpenAI server on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
@@ -1,30 +1,32 @@
 import os
 import faiss
-import pickle
-from sentence_transformers import SentenceTransformer
+from retriever import QUERY_TEMPLATE, retriever
+from src.metadata_store import load_metadata
+from src.ann_index import index_kind, read_index_info, search_parameters
 
 # Paths
 INDEX_PATH = "vector_store/faiss.index"
-META_PATH = "vector_store/metadata.pkl"
-
-# Initialize model
-model = SentenceTransformer("all-MiniLM-L6-v2")
+INDEX_SPEC_PATH = "vector_store/index_spec.json"
+META_PATH = "vector_store/metadata.bin"
+LEGACY_META_PATH = "vector_store/metadata.pkl"
 
 # Load FAISS index
 if not os.path.exists(INDEX_PATH):
     raise FileNotFoundError(f"FAISS index not found: {INDEX_PATH}")
 index = faiss.read_index(INDEX_PATH)
+index_meta = read_index_info(INDEX_SPEC_PATH)
 
-# Load metadata
+# Load metadata (columnar store, or a pickle from an older build)
+if not os.path.exists(META_PATH):
+    META_PATH = LEGACY_META_PATH
 if not os.path.exists(META_PATH):
     raise FileNotFoundError(f"Metadata file not found: {META_PATH}")
-with open(META_PATH, "rb") as f:
-    metadata = pickle.load(f)
+metadata = load_metadata(META_PATH)
 
 if len(metadata) == 0:
     raise ValueError("Metadata is empty")
 
-print(f"FAISS index has {index.ntotal} vectors")
+print(f"FAISS index has {index.ntotal} vectors ({index_meta['spec']}, {index_meta['search_params']})")
 print(f"Metadata has {len(metadata)} entries")
 
 # Check that index size matches metadata length
@@ -35,15 +37,20 @@ if index.ntotal != len(metadata):
 SUPPORTED_CITIES = ["Hyderabad", "Bengaluru", "Pune"]
 
 for city in SUPPORTED_CITIES:
-    query_vec = model.encode([f"{city} real estate infrastructure growth"]).astype("float32")
-    k = min(5 * 3, len(metadata))
-    _, idxs = index.search(query_vec, k)
-
-    found = 0
-    for i in idxs[0]:
-        if i >= len(metadata):
-            continue
-        meta_city = metadata[i].get("city", "")
-        if meta_city and city.lower() in meta_city.lower():
-            found += 1
-    print(f"City: {city}, Documents matching: {found}")
\ No newline at end of file
+    # Precomputed / cached query embedding (no forward pass when built with the index)
+    query_vec = retriever.query_cache.encode(QUERY_TEMPLATE.format(city=city))
+
+    # City-scoped search, same as retriever.retrieve_docs
+    ids = metadata.city_ids(city)
+    if len(ids) == 0:
+        print(f"City: {city}, Documents matching: 0")
+        continue
+
+    selector = faiss.IDSelectorBatch(ids)
+    params = search_parameters(index, index_kind(index), index_meta["search_params"], selector)
+    _, idxs = index.search(query_vec, min(5, len(ids)), params=params)
+
+    found = int((idxs[0] >= 0).sum())
+    print(f"City: {city}, Vectors: {len(ids)}, Documents matching: {found}")
+
+print("Query cache:", retriever.query_cache.stats())
\ No newline at end of file
@@ -0,0 +1,328 @@
+import json
+import os
+import threading
+import numpy as np
+
+from price_grid import file_hash
+
+MODEL_PATH = "models/best_price_model.pkl"
+COMPILED_PATH = "models/best_price_model.npz"
+
+# Rows evaluated together; small blocks keep the per-level working set in cache
+BLOCK_ROWS = 256
+# Largest batch served by the compiled model. It wins on small batches (no
+# per-call library overhead) but native XGBoost is faster from ~1k rows,
+# see benchmarks/bench_compiled_model.py
+COMPILED_MAX_ROWS = int(os.getenv("COMPILED_MAX_ROWS", 500))
+
+
+# -----------------------
+# Serving (NumPy only)
+# -----------------------
+class CompiledModel:
+    """
+    NumPy-only predictor for a compiled price model.
+
+    Linear models are a coefficient vector. Tree ensembles are flattened
+    into global node arrays (leaves point at themselves) over a table of
+    the distinct split conditions. Per block of rows every condition is
+    evaluated once, then all trees are walked together one level per
+    step: `depth` vectorized gathers instead of a call per tree or row.
+
+    Mirrors the sklearn API used by predictor.py: `predict(X)` and
+    `feature_names_in_`.
+    """
+
+    def __init__(self, arrays):
+        self.kind = str(arrays["kind"])
+        self.source_hash = str(arrays["source_hash"])
+        self.feature_names_in_ = arrays["feature_names"]
+
+        if self.kind == "linear":
+            self.coef = arrays["coef"]
+            self.intercept = float(arrays["intercept"])
+        else:
+            self.cond_feature = arrays["cond_feature"].astype(np.intp)
+            self.cond_threshold = arrays["cond_threshold"]
+            # Indices are kept as intp so np.take doesn't convert them per call
+            self.node_cond = arrays["node_cond"].astype(np.intp)
+            self.children = arrays["children"].astype(np.intp)  # [left, right] per node
+            self.missing_right = arrays["missing_right"].astype(np.uint8)
+            self.value = arrays["value"]
+            self.roots = arrays["roots"].astype(np.intp)
+            self.depth = int(arrays["depth"])
+            self.base = float(arrays["base"])
+            self.scale = float(arrays["scale"])
+            # XGBoost splits on x < t, sklearn trees on x <= t
+            self.strict = bool(arrays["strict"])
+
+    def predict(self, X):
+        # DataFrame.to_numpy is much faster than np.asarray on mixed bool/float frames
+        X = X.to_numpy(dtype="float64") if hasattr(X, "to_numpy") else np.asarray(X, dtype="float64")
+        if self.kind == "linear":
+            return X @ self.coef + self.intercept
+
+        out = np.empty(len(X))
+        for start in range(0, len(X), BLOCK_ROWS):
+            out[start:start + BLOCK_ROWS] = self._predict_trees(X[start:start + BLOCK_ROWS])
+        return out
+
+    def _predict_trees(self, X):
+        n = len(X)
+        n_conds = len(self.cond_feature) + 1  # last column: leaves (always left)
+
+        # Both libraries compare float32 feature values
+        x = X.astype("float32")[:, self.cond_feature]
+        go_right = np.zeros((n, n_conds), dtype=np.uint8)
+        if self.strict:
+            go_right[:, :-1] = x >= self.cond_threshold
+        else:
+            go_right[:, :-1] = x > self.cond_threshold
+        go_right = go_right.ravel()
+
+        missing = None
+        if np.isnan(x).any():
+            missing = np.zeros((n, n_conds), dtype=bool)
+            missing[:, :-1] = np.isnan(x)
+            missing = missing.ravel()
+
+        row_base = (np.arange(n, dtype=np.intp) * n_conds)[:, None]
+        node = np.repeat(self.roots[None, :], n, axis=0)
+
+        for _ in range(self.depth):
+            cond = np.take(self.node_cond, node)
+            cond += row_base
+            step = np.take(go_right, cond)
+            if missing is not None:
+                step = np.where(np.take(missing, cond), np.take(self.missing_right, node), step)
+            node *= 2
+            node += step
+            node = np.take(self.children, node)
+
+        return self.base + np.take(self.value, node).sum(axis=1) * self.scale
+
+
+class ServingModel:
+    """
+    The compiled model for batches up to `max_rows`, the native model for
+    larger ones. Same predict / feature_names_in_ API.
+
+    `load_native` is called on the first batch over `max_rows`, so a
+    process that only scores small batches never imports sklearn / xgboost.
+    """
+
+    def __init__(self, compiled, load_native, max_rows=COMPILED_MAX_ROWS):
+        self.compiled = compiled
+        self.max_rows = max_rows
+        self.feature_names_in_ = compiled.feature_names_in_
+        self._load_native = load_native
+        self._native = None
+        self._lock = threading.Lock()
+
+    @property
+    def native(self):
+        if self._native is None:
+            with self._lock:
+                if self._native is None:
+                    self._native = self._load_native()
+        return self._native
+
+    def predict(self, X):
+        if len(X) <= self.max_rows:
+            return self.compiled.predict(X)
+        return self.native.predict(X)
+
+
+def load_compiled_model(source_hash=None, path=COMPILED_PATH):
+    """
+    Compiled model, or None when missing or compiled from another pickle
+    """
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path) as data:
+        compiled = CompiledModel({key: data[key] for key in data.files})
+
+    if source_hash is not None and compiled.source_hash != source_hash:
+        print("[Warning] Compiled model is stale (model changed), ignoring")
+        return None
+    return compiled
+
+
+# -----------------------
+# Export (needs sklearn / xgboost)
+# -----------------------
+def _tree_depth(left, right):
+    depth = 0
+    stack = [(0, 0)]
+    while stack:
+        node, d = stack.pop()
+        depth = max(depth, d)
+        if left[node] != node:
+            stack.append((left[node], d + 1))
+            stack.append((right[node], d + 1))
+    return depth
+
+
+def _flatten_trees(trees):
+    """
+    Concatenate per-tree node arrays and replace each split by an index
+    into the table of distinct (feature, threshold) conditions. Leaves get
+    children pointing at themselves so extra walk steps are no-ops.
+    """
+    keys = {}
+    node_cond, children, missing_right, value = [], [], [], []
+    roots = []
+    depth = 0
+    offset = 0
+
+    for tree in trees:
+        n = len(tree["left"])
+        ids = np.arange(n)
+        leaf = tree["left"] < 0
+        left = np.where(leaf, ids, tree["left"])
+        right = np.where(leaf, ids, tree["right"])
+
+        for node in range(n):
+            if leaf[node]:
+                node_cond.append(-1)
+            else:
+                key = (int(tree["feature"][node]), float(tree["threshold"][node]))
+                node_cond.append(keys.setdefault(key, len(keys)))
+        children.append(np.stack([left, right], axis=1) + offset)
+        missing_right.append(~tree["missing_left"] & ~leaf)
+        value.append(np.where(leaf, tree["value"], 0.0))
+        roots.append(offset)
+        depth = max(depth, _tree_depth(left, right))
+        offset += n
+
+    node_cond = np.array(node_cond, dtype="int32")
+    node_cond[node_cond < 0] = len(keys)  # constant "go left" column
+
+    conditions = list(keys)
+    return {
+        "cond_feature": np.array([f for f, _ in conditions], dtype="int32"),
+        "cond_threshold": np.array([t for _, t in conditions], dtype="float64"),
+        "node_cond": node_cond,
+        "children": np.concatenate(children).ravel().astype("int32"),
+        "missing_right": np.concatenate(missing_right).astype(bool),
+        "value": np.concatenate(value).astype("float64"),
+        "roots": np.array(roots, dtype="int32"),
+        "depth": np.array(depth)
+    }
+
+
+def _sklearn_tree(estimator):
+    tree = estimator.tree_
+    missing = getattr(tree, "missing_go_to_left", None)
+    return {
+        "feature": tree.feature,
+        "threshold": tree.threshold,
+        "left": tree.children_left,
+        "right": tree.children_right,
+        "missing_left": missing if missing is not None else np.zeros(tree.node_count, dtype=bool),
+        "value": tree.value[:, 0, 0]
+    }
+
+
+def _xgboost_trees(booster):
+    model = json.loads(booster.save_raw("json"))
+    learner = model["learner"]
+    base = float(learner["learner_model_param"]["base_score"].strip("[]"))
+
+    trees = []
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        trees.append({
+            "feature": np.array(tree["split_indices"]),
+            "threshold": np.array(tree["split_conditions"], dtype="float32"),
+            "left": np.array(tree["left_children"]),
+            "right": np.array(tree["right_children"]),
+            "missing_left": np.array(tree["default_left"], dtype=bool),
+            # For leaves split_conditions holds the leaf value
+            "value": np.array(tree["split_conditions"], dtype="float32")
+        })
+    return trees, base
+
+
+def compile_model(model, source_hash=""):
+    """
+    Arrays for CompiledModel from a fitted LinearRegression / Ridge,
+    decision tree, random forest / extra trees or XGBRegressor
+    """
+    arrays = {
+        "source_hash": np.array(source_hash),
+        "feature_names": np.array(model.feature_names_in_)
+    }
+    name = type(model).__name__
+
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        arrays["kind"] = np.array("linear")
+        arrays["coef"] = np.asarray(model.coef_, dtype="float64").ravel()
+        arrays["intercept"] = np.array(float(np.ravel(model.intercept_)[0]))
+        return arrays
+
+    if name == "XGBRegressor":
+        objective = json.loads(model.get_booster().save_config())["learner"]["objective"]["name"]
+        if objective != "reg:squarederror":
+            raise ValueError(f"Unsupported XGBoost objective: {objective}")
+        trees, base = _xgboost_trees(model.get_booster())
+        arrays.update(_flatten_trees(trees))
+        arrays.update(kind=np.array("trees"), base=np.array(base),
+                      scale=np.array(1.0), strict=np.array(True))
+        return arrays
+
+    if hasattr(model, "tree_") or hasattr(model, "estimators_"):
+        estimators = [model] if hasattr(model, "tree_") else list(model.estimators_)
+        arrays.update(_flatten_trees([_sklearn_tree(e) for e in estimators]))
+        # Forests average their trees
+        arrays.update(kind=np.array("trees"), base=np.array(0.0),
+                      scale=np.array(1.0 / len(estimators)), strict=np.array(False))
+        return arrays
+
+    raise ValueError(f"Unsupported model type for compilation: {name}")
+
+
+def check_parity(model, compiled, X, rtol=1e-5):
+    """
+    Max relative difference between the original and compiled predictions;
+    raises when it exceeds `rtol`
+    """
+    expected = np.asarray(model.predict(X), dtype="float64")
+    actual = compiled.predict(X)
+    diff = np.max(np.abs(actual - expected) / np.maximum(np.abs(expected), 1.0))
+    if diff > rtol:
+        raise ValueError(f"Compiled model does not match the original (max rel diff {diff:.2e})")
+    return diff
+
+
+def export_compiled_model(model_path=MODEL_PATH, path=COMPILED_PATH):
+    """
+    Compile the pickled best model, check it against the original on the
+    full listings table, and save it next to the pickle
+    """
+    import joblib
+    import pandas as pd
+    from predictor import DATA_PATH, build_model_inputs
+    from listings import load_listings
+
+    model = joblib.load(model_path)
+    arrays = compile_model(model, file_hash(model_path))
+    compiled = CompiledModel(arrays)
+
+    # Parity on every listing at its own size
+    df = load_listings(DATA_PATH)
+    frame = build_model_inputs(df, df["Size_sqft"])
+    X = pd.get_dummies(frame).reindex(columns=model.feature_names_in_, fill_value=0)
+    diff = check_parity(model, compiled, X)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+    print(f"Compiled model saved: {path} ({type(model).__name__}, max rel diff {diff:.1e})")
+    return path
+
+
+if __name__ == "__main__":
+    export_compiled_model()
@@ -0,0 +1,197 @@
+import os
+import contextvars
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from telemetry import log_event
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 64))   # queued + running
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", 1000))       # finished jobs kept
+# Requests that run their own pipeline (/generate/stream, /generate/batch)
+JOB_MAX_STREAMS = int(os.getenv("JOB_MAX_STREAMS", 8))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, payload):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.status = "queued"   # queued → running → done | failed
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.stages = {}
+        self.result = None
+        self.error = None
+
+    @property
+    def wait_time(self):
+        if self.started_at is None:
+            return None
+        return round(self.started_at - self.created_at, 4)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wait_time": self.wait_time,
+            "stages": dict(self.stages),
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobQueue:
+    """
+    Bounded worker pool for report generation.
+
+    submit() returns a Job immediately; a worker thread runs the handler
+    with (job_id, payload, stages) and stores its return value as the job
+    result.
+    At most `max_pending` jobs may be queued or running; beyond that
+    submit() raises QueueFull.
+    """
+
+    def __init__(self, handler, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE,
+                 history=JOB_HISTORY, max_streams=JOB_MAX_STREAMS):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history = history
+        self.max_streams = max_streams
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.RLock()
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._streams = 0
+
+        self.completed = 0
+        self.failed = 0
+        self._wait_total = 0.0
+        self._stage_totals = {}
+
+    def submit(self, payload):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs pending")
+            job = self.track(payload)
+            self._pending += 1
+
+        # The worker runs in a copy of the submitter's context (request id)
+        self._executor.submit(contextvars.copy_context().run, self._run, job)
+        return job
+
+    def open_stream(self):
+        """
+        Claim one of max_streams slots for a request that runs its own
+        pipeline (raises QueueFull when all are taken). Returns the release
+        function; calling it more than once is harmless.
+        """
+        with self._lock:
+            if self._streams >= self.max_streams:
+                raise QueueFull(f"{self._streams} streams open")
+            self._streams += 1
+
+        released = []
+
+        def release():
+            with self._lock:
+                if not released:
+                    released.append(True)
+                    self._streams -= 1
+        return release
+
+    def track(self, payload):
+        """
+        Register a job that the caller runs itself (e.g. a streamed request)
+        """
+        job = Job(payload)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        return job
+
+    def _trim(self):
+        finished = [j for j in self._jobs.values() if j.status in ("done", "failed")]
+        for job in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job.id]
+
+    def _run(self, job):
+        self.start(job)
+        try:
+            result = self.handler(job.id, job.payload, job.stages)
+        except Exception as e:
+            log_event("job_failed", job_id=job.id, error=str(e))
+            self.finish(job, error=str(e))
+        else:
+            self.finish(job, result=result)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def start(self, job):
+        job.started_at = time.time()
+        job.status = "running"
+
+    def finish(self, job, result=None, error=None):
+        job.finished_at = time.time()
+        with self._lock:
+            if error is None:
+                job.result = result
+                job.status = "done"
+                self.completed += 1
+            else:
+                job.error = error
+                job.status = "failed"
+                self.failed += 1
+
+            self._wait_total += job.wait_time or 0.0
+            for name, seconds in job.stages.items():
+                total, count = self._stage_totals.get(name, (0.0, 0))
+                self._stage_totals[name] = (total + seconds, count + 1)
+
+    def abandon(self, job, reason):
+        """
+        Fail a caller-run job that stopped before finishing (e.g. the
+        client of a streamed request disconnected); no-op once finished
+        """
+        with self._lock:
+            if job.status in ("done", "failed"):
+                return
+            log_event("job_abandoned", job_id=job.id, reason=reason)
+            self.finish(job, error=reason)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            queued = sum(1 for j in self._jobs.values() if j.status == "queued")
+            running = sum(1 for j in self._jobs.values() if j.status == "running")
+            finished = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "queue_depth": queued,
+                "running": running,
+                "streams": self._streams,
+                "max_streams": self.max_streams,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_time": self._wait_total / finished if finished else None,
+                "avg_stage_seconds": {
+                    name: total / count
+                    for name, (total, count) in self._stage_totals.items()
+                }
+            }
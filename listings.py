@@ -0,0 +1,89 @@
+import os
+import threading
+import pandas as pd
+
+from price_grid import file_hash
+
+# -----------------------------
+# Typed columnar listings cache
+# -----------------------------
+# The listings CSV is parsed once into an uncompressed Feather (Arrow IPC)
+# file with categorical string columns, named after the CSV's bytes. Each
+# process memory-maps it on first use and shares the frame between the
+# predictor, recommender and training code. When the CSV's mtime or size
+# changes it is hashed again and, if the bytes changed, the cache rebuilt.
+DATA_PATH = "data/structured/real_estate_data.csv"
+LISTINGS_CACHE_DIR = os.getenv("LISTINGS_CACHE_DIR", "cache/listings")
+CATEGORICAL_COLUMNS = ["City", "Locality", "Property_Type"]
+
+_lock = threading.Lock()
+_loaded = {}   # csv path → ((mtime_ns, size), DataFrame)
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def listings_cache_path(csv_path, source_hash, cache_dir=LISTINGS_CACHE_DIR):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{name}_{source_hash[:16]}.feather")
+
+
+def build_listings_cache(csv_path, cache_path):
+    """
+    Convert the CSV into a typed Feather file (atomic write) and drop
+    caches of earlier versions of the same CSV
+    """
+    import pyarrow.feather as feather  # heavy; only needed off the import path
+
+    df = pd.read_csv(csv_path)
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    # Uncompressed so readers can memory-map it
+    feather.write_feather(df, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, cache_path)
+
+    # Same CSV name + a 16-char hash: "<name>_<hash>.feather"
+    current = os.path.basename(cache_path)
+    prefix = current.rsplit("_", 1)[0] + "_"
+    for entry in os.listdir(cache_dir):
+        stale_hash = entry[len(prefix):-len(".feather")]
+        if (entry != current and entry.startswith(prefix) and entry.endswith(".feather")
+                and len(stale_hash) == 16 and "_" not in stale_hash):
+            os.remove(os.path.join(cache_dir, entry))
+
+    print(f"Listings cache built: {cache_path} ({len(df)} rows)")
+    return cache_path
+
+
+def load_listings(csv_path=DATA_PATH):
+    """
+    Listings with categorical City / Locality / Property_Type, loaded once
+    per process and shared by every caller: treat it as read-only
+    """
+    key = _stat_key(csv_path)
+    with _lock:
+        cached = _loaded.get(csv_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        cache_path = listings_cache_path(csv_path, file_hash(csv_path))
+        if not os.path.exists(cache_path):
+            build_listings_cache(csv_path, cache_path)
+
+        import pyarrow.feather as feather
+
+        table = feather.read_table(cache_path, memory_map=True)
+        df = table.to_pandas(split_blocks=True)
+        _loaded[csv_path] = (key, df)
+        return df
+
+
+def listings_loaded(csv_path=DATA_PATH):
+    return csv_path in _loaded
@@ -1,27 +1,146 @@
 import os
+import threading
 from dotenv import load_dotenv
-from openai import OpenAI
 import re
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def generate_report(prompt: str) -> str:
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are a real estate investment advisor."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.3,
-        max_tokens=1200
-    )
+# Imported after load_dotenv so .env can set LLM_CACHE_* options
+from llm_cache import LLMCache, CACHE_BYPASS
+from telemetry import Counter, span
 
-    text = response.choices[0].message.content
+_client = None
+_client_lock = threading.Lock()
 
+
+def get_client():
+    """
+    OpenAI client, created on first use (importing openai takes most of a
+    second, and a cache hit never needs it)
+    """
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                # OPENAI_BASE_URL lets us point at a local OpenAI-compatible server
+                _client = OpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    base_url=os.getenv("OPENAI_BASE_URL") or None
+                )
+    return _client
+
+
+def client_loaded():
+    return _client is not None
+
+
+MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "You are a real estate investment advisor."
+TEMPERATURE = 0.3
+MAX_TOKENS = 1200
+
+# Shared on-disk response cache (see llm_cache.py)
+cache = LLMCache()
+
+LLM_REQUESTS = Counter(
+    "golden_mile_llm_requests_total", "Report completions by cache outcome", ["cache"]
+)
+LLM_TOKENS = Counter(
+    "golden_mile_llm_tokens_total", "Tokens used by LLM calls", ["kind"]
+)
+
+
+def _record_usage(usage, fields):
+    # Some OpenAI-compatible servers omit usage
+    if usage is None:
+        return
+    fields.update(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+    LLM_TOKENS.inc(usage.prompt_tokens, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens, kind="completion")
+
+
+def _messages(prompt: str):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def clean_report(text: str) -> str:
     # 🔹 CLEAN MARKDOWN (minimal post-processing)
     text = re.sub(r"\*\*+", "", text)   # remove **
     text = re.sub(r"#+", "", text)      # remove ###
     text = re.sub(r"- ", "", text)      # remove bullets
 
-    return text.strip()
\ No newline at end of file
+    return text.strip()
+
+
+def _cache_key(prompt: str) -> str:
+    return LLMCache.make_key(MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE, MAX_TOKENS)
+
+
+def generate_report(prompt: str, bypass_cache: bool = False) -> str:
+    use_cache = not (bypass_cache or CACHE_BYPASS)
+    key = _cache_key(prompt)
+
+    text = cache.get(key) if use_cache else None
+    if text is None:
+        LLM_REQUESTS.inc(cache="miss" if use_cache else "bypass")
+        with span("llm_call", model=MODEL) as fields:
+            response = get_client().chat.completions.create(
+                model=MODEL,
+                messages=_messages(prompt),
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS
+            )
+            _record_usage(response.usage, fields)
+
+        text = response.choices[0].message.content
+        cache.put(key, text)
+    else:
+        LLM_REQUESTS.inc(cache="hit")
+
+    return clean_report(text)
+
+
+def generate_report_stream(prompt: str, bypass_cache: bool = False):
+    """
+    Yield raw completion text deltas as the LLM produces them.
+    Callers join the deltas and run clean_report() on the result.
+    A cached completion is yielded as a single delta.
+    """
+    use_cache = not (bypass_cache or CACHE_BYPASS)
+    key = _cache_key(prompt)
+
+    text = cache.get(key) if use_cache else None
+    if text is not None:
+        LLM_REQUESTS.inc(cache="hit")
+        yield text
+        return
+
+    LLM_REQUESTS.inc(cache="miss" if use_cache else "bypass")
+    parts = []
+    with span("llm_call", model=MODEL, stream=True) as fields:
+        stream = get_client().chat.completions.create(
+            model=MODEL,
+            messages=_messages(prompt),
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            stream=True,
+            # Final chunk carries token usage (and no choices)
+            stream_options={"include_usage": True}
+        )
+
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                _record_usage(chunk.usage, fields)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+
+    cache.put(key, "".join(parts))
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+CACHE_DIR = os.getenv("LLM_CACHE_DIR", "cache/llm")
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))       # seconds
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "0") == "1"
+
+# Eviction trims the directory to this fraction of max_bytes, so a full
+# cache isn't rescanned on every write
+EVICT_LOW_WATER = 0.9
+# Writes between full rescans, to pick up entries other processes wrote
+RESCAN_EVERY = 100
+
+
+class LLMCache:
+    """
+    Content-addressed on-disk cache for chat completions.
+
+    One JSON file per entry, named by the SHA-256 of the request. Entries
+    are written to a temp file and renamed into place, so several worker
+    processes can share the directory: readers see a whole entry or none,
+    and an entry evicted by another process reads as a miss.
+
+    The directory size is tracked approximately in memory (this process's
+    writes since the last scan); the directory is only scanned when that
+    crosses max_bytes or every RESCAN_EVERY writes.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        self._approx_bytes = None   # unknown until the first scan
+        self._writes_since_scan = 0
+
+    @staticmethod
+    def make_key(model, system_prompt, prompt, temperature, max_tokens):
+        payload = json.dumps(
+            [model, system_prompt, prompt, temperature, max_tokens],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._count("misses")
+            return None
+
+        # Well-formed JSON without the expected fields counts as torn too
+        if (not isinstance(entry, dict)
+                or not isinstance(entry.get("created"), (int, float))
+                or not isinstance(entry.get("text"), str)):
+            self._count("misses")
+            return None
+
+        if time.time() - entry["created"] > self.ttl:
+            self._count("expired")
+            self._count("misses")
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+
+        self._count("hits")
+        return entry["text"]
+
+    def put(self, key, text):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created": time.time(), "text": text}, f, ensure_ascii=False)
+            size = f.tell()
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._writes_since_scan += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += size
+            scan = (
+                self._approx_bytes is None
+                or self._approx_bytes > self.max_bytes
+                or self._writes_since_scan >= RESCAN_EVERY
+            )
+            if scan:
+                self._writes_since_scan = 0
+        if scan:
+            self._evict()
+
+    def _evict(self):
+        """
+        Scan the directory; if it is over max_bytes, drop oldest entries
+        until it fits in EVICT_LOW_WATER * max_bytes
+        """
+        entries = []
+        total = 0
+        for item in os.scandir(self.cache_dir):
+            if not item.name.endswith(".json"):
+                continue
+            try:
+                st = item.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, item.path))
+            total += st.st_size
+
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_LOW_WATER
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                    self._count("evictions")
+                except FileNotFoundError:
+                    pass  # another worker got there first
+                total -= size
+                if total <= target:
+                    break
+
+        with self._lock:
+            self._approx_bytes = total
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else None
+        }
@@ -0,0 +1,215 @@
+import math
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import KFold, ParameterSampler, cross_val_score
+from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+from training import scoring_latency_ms, timed_fit
+
+try:
+    from xgboost import XGBRegressor
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    XGBOOST_AVAILABLE = False
+
+# -----------------------
+# Budgeted hyperparameter search (successive halving)
+# -----------------------
+# Each family samples ETA^rungs configurations, scores them with K-fold CV
+# at a small n_estimators, and promotes the best 1/ETA to the next rung
+# with ETA times more trees. Folds run in parallel on all cores. The
+# wall-clock budget covers the search and the finalist refits: halving
+# stops while there is still time to refit the best finalist (estimated
+# from its CV time per tree), and further finalists are only refit while
+# budget remains. The best configurations of the last rung reached are kept.
+SEARCH_BUDGET_SEC = float(os.getenv("SEARCH_BUDGET_SEC", 300))
+LATENCY_TARGET_MS = float(os.getenv("LATENCY_TARGET_MS", 50))   # scoring one request's listings
+SEARCH_LOG_PATH = "reports/hyperparameter_search.csv"
+
+ETA = 3
+CV_FOLDS = 5
+N_FINALISTS = 3     # kept from the last rung, then filtered on latency
+RANDOM_STATE = 42
+
+SEARCH_SPACES = {
+    "Random_Forest": {
+        "estimator": RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=1),
+        "min_trees": 30,
+        "max_trees": 400,
+        "params": {
+            "max_depth": [8, 12, 15, 20, None],
+            "min_samples_leaf": [1, 2, 4, 8],
+            "max_features": [1.0, 0.6, 0.3]
+        }
+    }
+}
+
+if XGBOOST_AVAILABLE:
+    SEARCH_SPACES["XGBoost"] = {
+        "estimator": XGBRegressor(random_state=RANDOM_STATE, n_jobs=1),
+        "min_trees": 50,
+        "max_trees": 800,
+        "params": {
+            "max_depth": [3, 4, 5, 6, 8],
+            "learning_rate": [0.02, 0.05, 0.1],
+            "subsample": [0.7, 0.8, 1.0],
+            "colsample_bytree": [0.6, 0.8, 1.0],
+            "min_child_weight": [1, 3, 5]
+        }
+    }
+
+
+def rung_sizes(min_trees, max_trees):
+    """
+    n_estimators per rung: min_trees * ETA^i, the last rung at max_trees
+    """
+    rungs = int(math.log(max_trees / min_trees, ETA)) + 1
+    sizes = [min_trees * ETA ** i for i in range(rungs - 1)]
+    return sizes + [max_trees]
+
+
+def successive_halving(name, space, X, y, deadline, log, n_jobs=-1):
+    """
+    Finalists [(cv_r2, n_estimators, params)] of the last rung reached,
+    best first. Every evaluation is appended to `log`.
+    """
+    cv = KFold(CV_FOLDS, shuffle=True, random_state=RANDOM_STATE)
+    sizes = rung_sizes(space["min_trees"], space["max_trees"])
+    configs = list(ParameterSampler(
+        space["params"], ETA ** len(sizes), random_state=RANDOM_STATE
+    ))
+    finalists = []
+    # Refit cost per tree, from the slowest CV run: folds run in
+    # ceil(folds / cores) rounds, and the refit trains on folds/(folds-1)
+    # times a fold's data
+    fold_rounds = math.ceil(CV_FOLDS / (os.cpu_count() or 1))
+    refit_sec_per_tree = 0.0
+
+    for rung, n_trees in enumerate(sizes):
+        scored = []
+        for params in configs:
+            # Leave time to refit the best finalist at this rung's size
+            if time.monotonic() + refit_sec_per_tree * n_trees > deadline:
+                break
+
+            model = clone(space["estimator"]).set_params(n_estimators=n_trees, **params)
+            start = time.perf_counter()
+            scores = cross_val_score(model, X, y, cv=cv, scoring="r2", n_jobs=n_jobs)
+            cv_sec = time.perf_counter() - start
+            refit_sec_per_tree = max(
+                refit_sec_per_tree,
+                cv_sec / n_trees / fold_rounds * CV_FOLDS / (CV_FOLDS - 1)
+            )
+            log.append({
+                "Family": name,
+                "Rung": rung,
+                "n_estimators": n_trees,
+                "Params": str(params),
+                "CV_R2": scores.mean(),
+                "CV_R2_std": scores.std(),
+                "CV_Time_s": cv_sec
+            })
+            scored.append((scores.mean(), n_trees, params))
+
+        if not scored:
+            print(f"   {name}: budget exhausted before rung {rung}")
+            break
+
+        scored.sort(key=lambda item: -item[0])
+        finalists = scored[:N_FINALISTS]
+        print(f"   {name} rung {rung}: {len(scored)} configs x {n_trees} trees, "
+              f"best CV R2 {scored[0][0]:.4f}")
+
+        if len(scored) < len(configs):
+            print(f"   {name}: budget exhausted during rung {rung}")
+            break
+        configs = [params for _, _, params in scored[:max(N_FINALISTS, len(scored) // ETA)]]
+
+    return finalists
+
+
+def pick_finalist(name, space, finalists, X_train, y_train, X_latency, latency_target_ms, deadline):
+    """
+    Refit the finalists on the whole training split (the best always, the
+    rest while the deadline allows) and keep the best CV R2 that scores a
+    request within the latency target (the fastest if none do).
+    Returns (cv_r2, latency_ms, n_trees, params, model, fit_time_s, peak_mem_mb).
+    """
+    n_jobs = os.cpu_count() or 1
+    fitted = []
+    for cv_r2, n_trees, params in finalists:
+        if fitted and time.monotonic() > deadline:
+            print(f"   {name}: budget exhausted, {len(finalists) - len(fitted)} finalist(s) not refit")
+            break
+        model = clone(space["estimator"]).set_params(n_estimators=n_trees, n_jobs=n_jobs, **params)
+        fit_time, peak_mem = timed_fit(model, X_train, y_train)
+        # Timed as served: compiled model for small batches, native above
+        latency = scoring_latency_ms(model, X_latency)
+        print(f"   {name} finalist: CV R2 {cv_r2:.4f}, {n_trees} trees, fit {fit_time:.1f}s, "
+              f"{latency:.1f} ms/request, {params}")
+        fitted.append((cv_r2, latency, n_trees, params, model, fit_time, peak_mem))
+
+    eligible = [f for f in fitted if f[1] <= latency_target_ms]
+    if eligible:
+        return max(eligible, key=lambda f: f[0])
+
+    print(f"[Warning] No {name} finalist meets {latency_target_ms} ms, keeping the fastest")
+    return min(fitted, key=lambda f: f[1])
+
+
+def run_search(X_train, y_train, X_test, y_test, model_dir,
+               budget_sec=SEARCH_BUDGET_SEC, latency_target_ms=LATENCY_TARGET_MS,
+               log_path=SEARCH_LOG_PATH):
+    """
+    Search every family within `budget_sec` (split evenly), save the pick
+    of each as models/<family>_Search.pkl and return comparison rows for
+    stage1_model.py
+    """
+    X_latency = pd.concat([X_train, X_test])  # one request scores every listing
+    log = []
+    rows = []
+    start = time.monotonic()
+
+    families = list(SEARCH_SPACES.items())
+    for i, (name, space) in enumerate(families):
+        # Unused budget carries over to the remaining families
+        remaining = budget_sec - (time.monotonic() - start)
+        deadline = time.monotonic() + remaining / (len(families) - i)
+        print(f"\nSearching {name} ({remaining / (len(families) - i):.0f}s budget)...")
+
+        finalists = successive_halving(name, space, X_train, y_train, deadline, log)
+        if not finalists:
+            continue
+
+        cv_r2, latency, n_trees, params, model, fit_time, peak_mem = pick_finalist(
+            name, space, finalists, X_train, y_train, X_latency, latency_target_ms, deadline
+        )
+
+        search_name = f"{name}_Search"
+        joblib.dump(model, f"{model_dir}/{search_name}.pkl")
+
+        start_predict = time.perf_counter()
+        y_pred = model.predict(X_test)
+        rows.append({
+            "Model": search_name,
+            "RMSE": np.sqrt(mean_squared_error(y_test, y_pred)),
+            "MAE": mean_absolute_error(y_test, y_pred),
+            "R2": r2_score(y_test, y_pred),
+            "Fit_Time_s": fit_time,
+            "Predict_Time_s": time.perf_counter() - start_predict,
+            "Peak_Mem_MB": peak_mem,
+            "n_jobs": model.get_params()["n_jobs"],
+            "CV_R2": cv_r2,
+            "Params": str({"n_estimators": n_trees, **params})
+        })
+
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    pd.DataFrame(log).to_csv(log_path, index=False)
+    print(f"\nSearch done in {time.monotonic() - start:.0f}s, {len(log)} CV runs logged to {log_path}")
+    return rows
@@ -1,23 +1,46 @@
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import LETTER
+from collections import OrderedDict
+from io import BytesIO
 import os
+import threading
 import time
 
-def generate_pdf(text):
-    os.makedirs("reports", exist_ok=True)
-    path = f"reports/Golden_Mile_Report_{int(time.time())}.pdf"
+from telemetry import span
 
-    doc = SimpleDocTemplate(path, pagesize=LETTER)
-    styles = getSampleStyleSheet()
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 64 * 1024 * 1024))
 
-    heading = ParagraphStyle(
-        "Heading",
-        parent=styles["Heading2"],
-        spaceAfter=12
-    )
+_styles = None
 
-    normal = styles["Normal"]
+
+def get_styles():
+    """
+    (heading, normal) paragraph styles, built once per process
+    """
+    global _styles
+    if _styles is None:
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+        styles = getSampleStyleSheet()
+
+        heading = ParagraphStyle(
+            "Heading",
+            parent=styles["Heading2"],
+            spaceAfter=12
+        )
+
+        _styles = (heading, styles["Normal"])
+    return _styles
+
+
+def render_pdf(text, output):
+    """
+    Render report text as a PDF into a path or file-like object
+    """
+    # reportlab is only imported once a PDF is actually rendered
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.pagesizes import LETTER
+
+    doc = SimpleDocTemplate(output, pagesize=LETTER)
+    heading, normal = get_styles()
     story = []
 
     for line in text.split("\n"):
@@ -30,4 +53,69 @@ def generate_pdf(text):
             story.append(Paragraph(line.replace("₹", "Rs."), normal))
 
     doc.build(story)
-    return path
\ No newline at end of file
+
+
+def render_pdf_bytes(text):
+    buffer = BytesIO()
+    render_pdf(text, buffer)
+    return buffer.getvalue()
+
+
+class PDFCache:
+    """
+    Rendered PDF bytes by report id, evicting least recently used
+    reports once the total exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes=PDF_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.renders = 0
+        self.evictions = 0
+        self.render_time = 0.0
+
+    def get_or_render(self, report_id, text):
+        with self._lock:
+            data = self._items.get(report_id)
+            if data is not None:
+                self._items.move_to_end(report_id)
+                self.hits += 1
+                return data
+
+        start = time.perf_counter()
+        with span("pdf_render", report_id=report_id) as fields:
+            data = render_pdf_bytes(text)
+            fields["bytes"] = len(data)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.renders += 1
+            self.render_time += elapsed
+            if report_id not in self._items:
+                self._items[report_id] = data
+                self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                _, old = self._items.popitem(last=False)
+                self._bytes -= len(old)
+                self.evictions += 1
+        return data
+
+    def stats(self):
+        return {
+            "entries": len(self._items),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "renders": self.renders,
+            "evictions": self.evictions,
+            "avg_render_sec": self.render_time / self.renders if self.renders else None
+        }
+
+
+# Process-wide cache used by /download
+pdf_cache = PDFCache()
@@ -0,0 +1,131 @@
+import os
+import time
+import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from predictor import predict_properties
+from retriever import retrieve_docs
+from prompt import build_llm_prompt
+from llm import generate_report
+from telemetry import span, log_event
+
+# Shared pool for independent stages (model scoring, FAISS search and
+# query encoding all release the GIL, so threads overlap them)
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", 8))
+_stage_pool = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="stage")
+
+
+def parse_user_inputs(data):
+    # --- Dynamic user inputs ---
+    return {
+        "city": data["city"],
+        "budget": float(data["budget"]),
+        "size": float(data["size"]),
+        "metro": data.get("metro", "Yes"),  # Yes/No from UI
+        "intent": data.get("intent", "Investment")
+    }
+
+
+@contextmanager
+def timed_stage(stages, name):
+    """
+    Record the wall time of a pipeline stage (seconds) into `stages`, and
+    as a telemetry span (metrics + structured log line)
+    """
+    start = time.perf_counter()
+    try:
+        with span(name) as fields:
+            yield fields
+    finally:
+        stages[name] = round(time.perf_counter() - start, 4)
+
+
+def run_concurrently(stages, tasks):
+    """
+    Run independent stages on the stage pool and join them.
+    `tasks` maps stage name → (fn, *args); returns name → result.
+    """
+    def timed_call(name, fn, *args):
+        with timed_stage(stages, name):
+            return fn(*args)
+
+    # Each task runs in a copy of the caller's context (keeps the request id)
+    futures = {
+        name: _stage_pool.submit(contextvars.copy_context().run, timed_call, name, fn, *args)
+        for name, (fn, *args) in tasks.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+
+def save_report_json(user_inputs, recommendations, report_text, report_id=None, stages=None):
+    os.makedirs("reports/json", exist_ok=True)
+    json_path = f"reports/json/report_{report_id or int(time.time())}.json"
+    with open(json_path, "w") as f:
+        json.dump({
+            "user_inputs": user_inputs,
+            "recommendations": recommendations.to_dict(orient="records"),
+            "analysis": report_text,
+            "timings": dict(stages or {})
+        }, f, indent=2)
+    return json_path
+
+
+def prepare_prompt(user_inputs, stages):
+    """
+    Stages 1-3: ML predictions and document retrieval (concurrently), prompt
+    """
+    # --- 1️⃣ ML predictions + 2️⃣ Retrieve documents (independent, run together) ---
+    with timed_stage(stages, "predict_and_retrieve") as fields:
+        results = run_concurrently(stages, {
+            "predict": (predict_properties, user_inputs),
+            "retrieve": (retrieve_docs, user_inputs["city"])
+        })
+        recommendations = results["predict"]
+        documents = results["retrieve"]
+        fields.update(rows=len(recommendations), documents=len(documents))
+
+    # --- 3️⃣ Build prompt ---
+    with timed_stage(stages, "prompt") as fields:
+        prompt = build_llm_prompt(recommendations, documents, user_inputs)
+        fields["chars"] = len(prompt)
+
+    return recommendations, documents, prompt
+
+
+def finish_report(user_inputs, recommendations, report_text, stages, report_id=None):
+    """
+    Stage 5: save JSON. The PDF is rendered lazily on first download.
+    """
+    # --- 5️⃣ Save JSON ---
+    with timed_stage(stages, "save_json") as fields:
+        json_path = save_report_json(
+            user_inputs, recommendations, report_text, report_id, stages
+        )
+        fields["path"] = json_path
+
+    return {
+        "analysis": report_text,
+        "json_path": json_path
+    }
+
+
+def run_pipeline(user_inputs, bypass_cache=False, stages=None, report_id=None):
+    """
+    predict + retrieve → prompt → LLM → JSON (PDF is rendered on download)
+
+    Per-stage durations are written into `stages` as they complete.
+    `report_id` names the JSON file (defaults to a timestamp).
+    """
+    stages = {} if stages is None else stages
+
+    recommendations, _, prompt = prepare_prompt(user_inputs, stages)
+
+    # --- 4️⃣ LLM call ---
+    with timed_stage(stages, "llm"):
+        report_text = generate_report(prompt, bypass_cache=bypass_cache)
+
+    result = finish_report(user_inputs, recommendations, report_text, stages, report_id)
+    log_event("report_done", report_id=report_id, stages=dict(stages))
+    return result
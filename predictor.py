@@ -1,10 +1,72 @@
-import joblib
+import os
+import threading
+import numpy as np
 import pandas as pd
 
+from price_grid import GRID_PATH, file_hash, load_price_grid, lookup_price_grid
+from compiled_model import ServingModel, load_compiled_model
+from listings import load_listings
+from telemetry import Counter, span
+
 MODEL_PATH = "models/best_price_model.pkl"
-model = joblib.load(MODEL_PATH)
+DATA_PATH = "data/structured/real_estate_data.csv"
+
+# Loaded on first use (or by startup.warm_up) so importing this module is cheap
+_model = None
+_model_hash = None
+_model_lock = threading.Lock()
+
+
+def _load_native_model():
+    import joblib  # pulls in sklearn / xgboost; kept off the small-batch path
+
+    print("[Info] Loading the native price model")
+    return joblib.load(MODEL_PATH)
+
+
+def get_model():
+    """
+    The price model: the compiled NumPy model (compiled_model.py) when it
+    matches the pickle, with the unpickled sklearn / xgboost model loaded on
+    the first batch too large for it; otherwise just the unpickled model
+    """
+    global _model, _model_hash
 
-print("ML price-per-sqft model loaded ✅")
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model_hash = file_hash(MODEL_PATH)
+                compiled = load_compiled_model(_model_hash)
+                if compiled is not None:
+                    model = ServingModel(compiled, _load_native_model)
+                else:
+                    print("[Info] No compiled model for this pickle, using sklearn predict")
+                    model = _load_native_model()
+                print("ML price-per-sqft model loaded ✅")
+                _model = model
+    return _model
+
+
+def model_loaded():
+    return _model is not None
+
+
+# Columns the model was trained on (before one-hot encoding)
+FEATURE_COLUMNS = [
+    "City",
+    "Locality",
+    "Distance_to_metro_km",
+    "Property_Type",
+    "Age_years",
+    "Amenities_score",
+    "Size_sqft"
+]
+
+# Defaults used when the listings table is missing an optional column
+FEATURE_DEFAULTS = {
+    "Age_years": 5,
+    "Amenities_score": 5
+}
 
 
 def predict_price_per_sqft(input_dict):
@@ -13,39 +75,165 @@ def predict_price_per_sqft(input_dict):
     """
     df = pd.DataFrame([input_dict])
     df = pd.get_dummies(df)
+    model = get_model()
     df = df.reindex(columns=model.feature_names_in_, fill_value=0)
     return model.predict(df)[0]
 
 
+def build_model_inputs(listings: pd.DataFrame, size_sqft: float) -> pd.DataFrame:
+    """
+    Model input frame for every listing at the requested size
+    """
+    frame = pd.DataFrame(index=listings.index)
+    for col in FEATURE_COLUMNS:
+        if col == "Size_sqft":
+            frame[col] = size_sqft
+        elif col in listings.columns:
+            frame[col] = listings[col]
+        else:
+            frame[col] = FEATURE_DEFAULTS[col]
+    return frame
+
+
+def encode_features(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    One-hot encode a model input frame and align it to the trained columns
+    """
+    encoded = pd.get_dummies(frame)
+    return encoded.reindex(columns=get_model().feature_names_in_, fill_value=0)
+
+
+def predict_price_per_sqft_batch(frame: pd.DataFrame):
+    """
+    Vectorized ML prediction: one encode + one model call for the whole frame
+    """
+    if len(frame) == 0:
+        return np.empty(0)
+    with span("model_score", rows=len(frame)):
+        return get_model().predict(encode_features(frame))
+
+
+PRICE_GRID_LOOKUPS = Counter(
+    "golden_mile_price_grid_lookups_total", "Price grid lookups (miss → model scoring)", ["result"]
+)
+
+# Precomputed price grid, reloaded when the dataset or grid file changes
+_price_grid = None
+_price_grid_key = None
+
+
+def _file_key(path):
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def get_price_grid():
+    """
+    Price grid matching the loaded model and current dataset (or None)
+    """
+    global _price_grid, _price_grid_key
+
+    get_model()  # sets _model_hash
+    key = (_file_key(DATA_PATH), _file_key(GRID_PATH))
+    if key != _price_grid_key:
+        _price_grid = load_price_grid(_model_hash, file_hash(DATA_PATH))
+        _price_grid_key = key
+    return _price_grid
+
+
+def price_per_sqft_by_size(df: pd.DataFrame, sizes) -> dict:
+    """
+    {size: price-per-sqft for every listing}. On-grid sizes come from the
+    price grid; all off-grid sizes are scored in a single model call.
+    """
+    grid = get_price_grid()
+    prices = {}
+    missing = []
+    for size in dict.fromkeys(sizes):
+        column = lookup_price_grid(grid, size)
+        PRICE_GRID_LOOKUPS.inc(result="miss" if column is None else "hit")
+        if column is None:
+            missing.append(size)
+        else:
+            prices[size] = column
+
+    if missing:
+        frame = pd.concat([build_model_inputs(df, size) for size in missing], ignore_index=True)
+        scores = np.asarray(predict_price_per_sqft_batch(frame)).reshape(len(missing), len(df))
+        prices.update(zip(missing, scores))
+    return prices
+
+
+def prompt_frame(selected: pd.DataFrame, size, total_price) -> pd.DataFrame:
+    """
+    Selected listings and their predicted totals, shaped for the prompt
+    """
+    if selected.empty:
+        return pd.DataFrame([])
+
+    return pd.DataFrame({
+        "City": selected["City"].to_numpy(),
+        "Locality": selected["Locality"].to_numpy(),
+        "Size_sqft": size,  # ensure present for prompt
+        "Predicted_Total_Cr": pd.Series(total_price).round(2).to_numpy(),
+        "Distance_to_metro_km": selected["Distance_to_metro_km"].to_numpy()
+    })
+
+
+def select_properties(df: pd.DataFrame, user_inputs: dict, price_per_sqft) -> pd.DataFrame:
+    """
+    Listings within budget at the requested size, shaped for the prompt
+    """
+    size = user_inputs["size"]
+    total_price = (price_per_sqft * size) / 1e7  # → Cr
+
+    # Budget filter as a single vectorized mask
+    mask = total_price <= user_inputs["budget"] * 1.25
+    return prompt_frame(df[mask], size, total_price[mask])
+
+
+def predict_properties_streaming(user_inputs: dict) -> pd.DataFrame:
+    """
+    predict_properties for datasets too large to load: a chunked scan that
+    keeps the SCORING_TOP_N cheapest in-budget listings
+    """
+    from scoring import top_candidates  # scoring imports this module
+
+    size = user_inputs["size"]
+    candidates = top_candidates(size, user_inputs["budget"] * 1.25)
+    if candidates.empty:
+        return pd.DataFrame([])
+    return prompt_frame(candidates, size, candidates["Predicted_Total_Cr"].to_numpy())
+
+
 def predict_properties(user_inputs: dict) -> pd.DataFrame:
     """
     High-level business prediction used by Flask + LLM
     """
-    df = pd.read_csv("data/structured/real_estate_data.csv")  # unified dataset
-
-    results = []
-
-    for _, row in df.iterrows():
-        model_input = {
-            "City": row["City"],
-            "Locality": row["Locality"],
-            "Distance_to_metro_km": row["Distance_to_metro_km"],
-            "Property_Type": row["Property_Type"],
-            "Age_years": row.get("Age_years", 5),  # default if missing
-            "Amenities_score": row.get("Amenities_score", 5),
-            "Size_sqft": user_inputs["size"]
-        }
-
-        price_per_sqft = predict_price_per_sqft(model_input)
-        total_price = (price_per_sqft * user_inputs["size"]) / 1e7  # → Cr
-
-        if total_price <= user_inputs["budget"] * 1.25:
-            results.append({
-                "City": row["City"],
-                "Locality": row["Locality"],
-                "Size_sqft": user_inputs["size"],  # ensure present for prompt
-                "Predicted_Total_Cr": round(total_price, 2),
-                "Distance_to_metro_km": row["Distance_to_metro_km"]
-            })
-
-    return pd.DataFrame(results)
\ No newline at end of file
+    from scoring import use_streaming
+
+    if use_streaming(DATA_PATH):
+        return predict_properties_streaming(user_inputs)
+
+    df = load_listings(DATA_PATH)  # unified dataset, typed + cached
+
+    size = user_inputs["size"]
+    return select_properties(df, user_inputs, price_per_sqft_by_size(df, [size])[size])
+
+
+def predict_properties_batch(profiles: list) -> list:
+    """
+    predict_properties for many user inputs: one dataset read and one
+    model call for all off-grid sizes, then a budget mask per profile
+    """
+    from scoring import use_streaming
+
+    if use_streaming(DATA_PATH):
+        # One bounded scan per profile instead of the whole table in memory
+        return [predict_properties_streaming(p) for p in profiles]
+
+    df = load_listings(DATA_PATH)
+    prices = price_per_sqft_by_size(df, [p["size"] for p in profiles])
+    return [select_properties(df, p, prices[p["size"]]) for p in profiles]
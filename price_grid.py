@@ -0,0 +1,98 @@
+import hashlib
+import os
+import numpy as np
+
+GRID_PATH = "models/price_grid.npz"
+
+# Same buckets as src/data_generation.snap_size
+SIZE_BUCKETS = [
+    750, 900, 1000, 1200, 1350, 1500,
+    1800, 2000, 2200, 2500, 3000, 3500
+]
+
+
+def file_hash(path):
+    """
+    SHA-256 of a file's bytes (used to key the grid on model + dataset)
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def build_price_grid(grid_path=GRID_PATH):
+    """
+    Predict price-per-sqft for every listing x size bucket and save it
+    as a binary artifact next to the model
+    """
+    from predictor import (
+        MODEL_PATH as model_path,
+        DATA_PATH as data_path,
+        build_model_inputs,
+        predict_price_per_sqft_batch
+    )
+    from listings import load_listings
+
+    df = load_listings(data_path)
+
+    columns = [
+        predict_price_per_sqft_batch(build_model_inputs(df, size))
+        for size in SIZE_BUCKETS
+    ]
+    grid = np.column_stack(columns)  # shape: (listings, buckets)
+
+    os.makedirs(os.path.dirname(grid_path), exist_ok=True)
+    tmp_path = grid_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            grid=grid,
+            sizes=np.array(SIZE_BUCKETS, dtype="float64"),
+            model_hash=np.array(file_hash(model_path)),
+            data_hash=np.array(file_hash(data_path))
+        )
+    os.replace(tmp_path, grid_path)
+
+    print(f"Price grid saved: {grid_path} {grid.shape}")
+    return grid_path
+
+
+def load_price_grid(model_hash, data_hash, grid_path=GRID_PATH):
+    """
+    Load the grid if it exists and was built from the given model + dataset.
+    Returns None when missing or stale.
+    """
+    if not os.path.exists(grid_path):
+        return None
+
+    with np.load(grid_path) as data:
+        if str(data["model_hash"]) != model_hash:
+            print("[Warning] Price grid is stale (model changed), ignoring")
+            return None
+        if str(data["data_hash"]) != data_hash:
+            print("[Warning] Price grid is stale (dataset changed), ignoring")
+            return None
+
+        return {
+            "grid": data["grid"],
+            "sizes": data["sizes"]
+        }
+
+
+def lookup_price_grid(grid, size):
+    """
+    Precomputed price-per-sqft column for an on-grid size, else None
+    """
+    if grid is None:
+        return None
+
+    hits = np.flatnonzero(grid["sizes"] == size)
+    if len(hits) == 0:
+        return None
+    return grid["grid"][:, hits[0]]
+
+
+if __name__ == "__main__":
+    build_price_grid()
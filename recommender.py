@@ -1,9 +1,14 @@
-import pandas as pd
-from predictor import predict_price_per_sqft
+from listings import load_listings
+from scoring import grid_prices, score_chunk, top_candidates, use_streaming
 
 DATA_PATH = "data/structured/real_estate_data.csv"
 
-df = pd.read_csv(DATA_PATH)
+
+def get_listings():
+    """
+    Listings table, loaded on first use (shared typed cache, see listings.py)
+    """
+    return load_listings(DATA_PATH)
 
 
 def recommend_properties(
@@ -11,65 +16,33 @@ def recommend_properties(
     size_sqft,
     near_metro=True,
     preferred_city=None,
-    min_ppsf=5000
+    min_ppsf=5000,
+    top_n=5
 ):
     """
     Budget-based property recommendation engine
     """
 
-    df_copy = df.copy()
-
-    # -----------------------
-    # Optional city filter
-    # -----------------------
-    if preferred_city:
-        df_copy = df_copy[df_copy["City"].str.lower() == preferred_city.lower()]
-
-    # -----------------------
-    # Metro proximity filter
-    # -----------------------
-    if near_metro:
-        df_copy = df_copy[df_copy["Distance_to_metro_km"] <= 2]
-
     # -----------------------
-    # Predict Price per Sqft
+    # City / metro filters, realism guardrail, budget filter
     # -----------------------
-    df_copy["Predicted_PPSF"] = df_copy.apply(
-        lambda row: predict_price_per_sqft({
-            "City": row["City"],
-            "Locality": row["Locality"],
-            "Size_sqft": size_sqft,
-            "Age_years": row["Age_years"],
-            "Distance_to_metro_km": row["Distance_to_metro_km"],
-            "Amenities_score": row["Amenities_score"],
-            "Property_Type": row["Property_Type"]
-        }),
-        axis=1
-    )
+    filters = {
+        "city": preferred_city,
+        "max_metro_km": 2 if near_metro else None,
+        "min_ppsf": min_ppsf
+    }
 
     # -----------------------
-    # Realism guardrail
+    # Predict, rank & return
     # -----------------------
-    df_copy = df_copy[df_copy["Predicted_PPSF"] >= min_ppsf]
+    if use_streaming(DATA_PATH):
+        # Too large to hold in memory: chunked scan keeping the running top N
+        ranked = top_candidates(size_sqft, budget_cr, top_n, path=DATA_PATH, **filters)
+    else:
+        # Masks select rows; the cached table is never copied or modified
+        ranked = score_chunk(
+            get_listings(), size_sqft, budget_cr, top_n,
+            prices=grid_prices(size_sqft, DATA_PATH), **filters
+        )
 
-    # -----------------------
-    # Total price calculation
-    # -----------------------
-    df_copy["Predicted_Total_Cr"] = (
-        df_copy["Predicted_PPSF"] * size_sqft
-    ) / 1e7
-
-    # -----------------------
-    # Budget filter
-    # -----------------------
-    df_copy = df_copy[df_copy["Predicted_Total_Cr"] <= budget_cr]
-
-    # -----------------------
-    # Rank & return
-    # -----------------------
-    return (
-        df_copy
-        .sort_values("Predicted_Total_Cr")
-        .head(5)
-        .reset_index(drop=True)
-    )
\ No newline at end of file
+    return ranked.reset_index(drop=True)
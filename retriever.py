@@ -1,19 +1,331 @@
 import os
-import faiss
-import pickle
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
 
-# Initialize the SentenceTransformer model
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from src.metadata_store import load_metadata
+from telemetry import span
+
+# faiss (via src.ann_index) and sentence_transformers (torch) are imported
+# on first use so importing this module, and app.py, stays fast
+MODEL_NAME = "all-MiniLM-L6-v2"
 
 # Paths for FAISS index and metadata
 INDEX_PATH = "vector_store/faiss.index"
-META_PATH = "vector_store/metadata.pkl"
+INDEX_SPEC_PATH = "vector_store/index_spec.json"  # spec + nprobe/efSearch from the build
+META_PATH = "vector_store/metadata.bin"
+LEGACY_META_PATH = "vector_store/metadata.pkl"  # pickle stores from older builds
+# Templated city queries embedded at index build time
+QUERY_EMBED_PATH = "vector_store/query_embeddings.npz"
+
+QUERY_TEMPLATE = "{city} real estate infrastructure growth"
+QUERY_CACHE_SIZE = 1024
+
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    """
+    SentenceTransformer for query misses, loaded on first use
+    """
+    global _encoder
+
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                from sentence_transformers import SentenceTransformer
+                _encoder = SentenceTransformer(MODEL_NAME)
+    return _encoder
+
+
+def encoder_loaded():
+    return _encoder is not None
+
+
+def _file_key(path):
+    """
+    Cheap change-detection key for a vector store artifact
+    """
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class QueryEmbeddingCache:
+    """
+    Query embeddings without a forward pass on the common path.
+
+    Lookups hit the precomputed table written by build_vector_index.py
+    first, then a bounded LRU of previously encoded queries; only misses
+    call the SentenceTransformer.
+    """
+
+    def __init__(self, path=QUERY_EMBED_PATH, max_size=QUERY_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self._table = {}
+        self._table_key = None
+
+        self.precomputed_hits = 0
+        self.lru_hits = 0
+        self.misses = 0
+        self.encode_time = 0.0
+
+    def _precomputed(self):
+        if not os.path.exists(self.path):
+            return self._table
+
+        key = _file_key(self.path)
+        if key != self._table_key:
+            with np.load(self.path) as data:
+                if str(data["model"]) == MODEL_NAME:
+                    self._table = dict(zip(data["queries"].tolist(), data["vectors"]))
+                else:
+                    print("[Warning] Query embeddings built with another model, ignoring")
+                    self._table = {}
+            self._table_key = key
+        return self._table
+
+    def encode(self, query: str):
+        vec = self._precomputed().get(query)
+        if vec is not None:
+            self.precomputed_hits += 1
+            return vec.reshape(1, -1)
+
+        with self._lock:
+            vec = self._lru.get(query)
+            if vec is not None:
+                self._lru.move_to_end(query)
+                self.lru_hits += 1
+                return vec
+
+        start = time.perf_counter()
+        vec = get_encoder().encode([query]).astype("float32")  # FAISS requires float32
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.misses += 1
+            self.encode_time += elapsed
+            self._lru[query] = vec
+            if len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+        return vec
+
+    def stats(self):
+        hits = self.precomputed_hits + self.lru_hits
+        total = hits + self.misses
+        avg_encode = self.encode_time / self.misses if self.misses else None
+        return {
+            "precomputed_queries": len(self._table),
+            "lru_entries": len(self._lru),
+            "precomputed_hits": self.precomputed_hits,
+            "lru_hits": self.lru_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / total if total else None,
+            "avg_encode_sec": avg_encode,
+            # Estimated from the average cost of the encodes we did run
+            "saved_encode_sec": hits * avg_encode if avg_encode else None
+        }
+
+
+class Retriever:
+    """
+    Process-resident FAISS retriever.
+
+    The index and metadata are loaded once and kept in memory. Before each
+    lookup the artifacts' mtime/size are checked; when build_vector_index.py
+    rewrites them, a fresh snapshot is loaded and swapped in. Queries that
+    already hold the old snapshot finish against it.
+    """
+
+    def __init__(self, index_path=INDEX_PATH, meta_path=META_PATH,
+                 legacy_meta_path=LEGACY_META_PATH, spec_path=INDEX_SPEC_PATH):
+        self.index_path = index_path
+        self.spec_path = spec_path
+        self.meta_path = meta_path
+        self.legacy_meta_path = legacy_meta_path
+
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+        self.query_cache = QueryEmbeddingCache()
+
+        self.load_time = None
+        self.loaded_at = None
+        self.reload_count = 0
+
+    def _metadata_path(self):
+        if os.path.exists(self.meta_path):
+            return self.meta_path
+        if os.path.exists(self.legacy_meta_path):
+            return self.legacy_meta_path
+        return None
+
+    def _current_key(self):
+        if not os.path.exists(self.index_path):
+            print(f"[Warning] FAISS index not found at {self.index_path}")
+            return None
+        meta_path = self._metadata_path()
+        if meta_path is None:
+            print(f"[Warning] Metadata file not found at {self.meta_path}")
+            return None
+        # Rewritten spec files (e.g. new nprobe) also trigger a reload
+        spec_key = _file_key(self.spec_path) if os.path.exists(self.spec_path) else None
+        return (_file_key(self.index_path), meta_path, _file_key(meta_path), spec_key)
+
+    def _load(self, key):
+        import faiss
+        from src.ann_index import index_kind, read_index_info
+
+        start = time.perf_counter()
+
+        index = faiss.read_index(self.index_path)
+        # Columnar stores are memory-mapped, legacy pickles are read whole
+        metadata = load_metadata(key[1])
+
+        if index.ntotal != len(metadata):
+            # Build is probably mid-write; keep serving the previous snapshot
+            print("[Warning] Index/metadata size mismatch, skipping reload")
+            return None
+
+        # Search params come from the spec file, the index family from the
+        # index itself (the spec file may briefly lag a rebuilt index)
+        info = read_index_info(self.spec_path)
+
+        self.load_time = time.perf_counter() - start
+        self.loaded_at = time.time()
+        return {
+            "key": key,
+            "index": index,
+            "kind": index_kind(index),
+            "index_info": info,
+            "metadata": metadata,
+            "city_selectors": {}
+        }
+
+    def snapshot(self):
+        """
+        Current index + metadata snapshot, reloading if the artifacts changed
+        """
+        key = self._current_key()
+        if key is None:
+            return self._snapshot
+
+        current = self._snapshot
+        if current is not None and current["key"] == key:
+            return current
+
+        with self._lock:
+            current = self._snapshot
+            if current is not None and current["key"] == key:
+                return current
+
+            fresh = self._load(key)
+            if fresh is None:
+                return current
+
+            if current is not None:
+                self.reload_count += 1
+                print(f"[Info] Vector store reloaded ({fresh['index'].ntotal} vectors)")
+            self._snapshot = fresh
+            return fresh
+
+    def warm_up(self):
+        """
+        Load the index snapshot and precomputed query table ahead of the
+        first request; returns the snapshot (None when the store is missing)
+        """
+        self.query_cache._precomputed()
+        return self.snapshot()
+
+    @property
+    def loaded(self):
+        return self._snapshot is not None
+
+    def stats(self):
+        snap = self._snapshot
+        return {
+            "loaded": snap is not None,
+            "load_time_sec": self.load_time,
+            "loaded_at": self.loaded_at,
+            "reload_count": self.reload_count,
+            "index_vectors": snap["index"].ntotal if snap else 0,
+            "index_spec": snap["index_info"]["spec"] if snap else None,
+            "search_params": snap["index_info"]["search_params"] if snap else None,
+            "metadata_entries": len(snap["metadata"]) if snap else 0,
+            "index_bytes": os.path.getsize(self.index_path) if snap else 0,
+            "metadata_path": snap["metadata"].path if snap else None,
+            "metadata_bytes": os.path.getsize(snap["metadata"].path) if snap else 0,
+            "query_cache": self.query_cache.stats()
+        }
+
+    def city_selector(self, snap, city: str):
+        """
+        Cached (ids, IDSelector) for every vector whose city matches
+        """
+        import faiss
+
+        city_key = city.lower()
+        cache = snap["city_selectors"]
+        if city_key not in cache:
+            ids = snap["metadata"].city_ids(city)  # partial match
+            cache[city_key] = (ids, faiss.IDSelectorBatch(ids))
+        return cache[city_key]
+
+    def retrieve(self, city: str, k: int = 5):
+        from src.ann_index import search_parameters
+
+        snap = self.snapshot()
+        if snap is None:
+            return []
+
+        index, metadata = snap["index"], snap["metadata"]
+
+        if len(metadata) == 0:
+            print("[Warning] Metadata is empty")
+            return []
+
+        ids, selector = self.city_selector(snap, city)
+        if len(ids) == 0:
+            print(f"[Info] No documents indexed for city: {city}")
+            return []
+
+        # Encode query (precomputed / cached for the templated city queries)
+        with span("encode_query"):
+            query_vec = self.query_cache.encode(QUERY_TEMPLATE.format(city=city))
+
+        # City-scoped FAISS search: only this city's vectors are candidates
+        k = min(k, len(ids))
+        search_params = snap["index_info"]["search_params"]
+        with span("faiss_search", k=k, candidates=len(ids), index=snap["kind"]) as fields:
+            params = search_parameters(index, snap["kind"], search_params, selector)
+            _, idxs = index.search(query_vec, k, params=params)
+
+            if snap["kind"] != "flat" and (idxs[0] < 0).any():
+                # Filtered ANN search can run out of candidates for small cities
+                params = search_parameters(index, snap["kind"], search_params, selector, widen=True)
+                _, idxs = index.search(query_vec, k, params=params)
+                fields["widened"] = True
+
+        docs = [metadata[i] for i in idxs[0] if 0 <= i < len(metadata)]
+
+        print(f"[Info] Retrieved {len(docs)} documents for city: {city}")
+        return docs
+
+
+# One resident retriever per process
+retriever = Retriever()
+
 
 def retrieve_docs(city: str, k: int = 5):
     """
     Retrieve top-k documents relevant to a city using FAISS and SentenceTransformer.
-    
+
     Args:
         city (str): City name to search for.
         k (int): Number of documents to return.
@@ -21,40 +333,4 @@ def retrieve_docs(city: str, k: int = 5):
     Returns:
         List[dict]: List of metadata dicts for relevant documents.
     """
-    # Check if index and metadata exist
-    if not os.path.exists(INDEX_PATH):
-        print(f"[Warning] FAISS index not found at {INDEX_PATH}")
-        return []
-    if not os.path.exists(META_PATH):
-        print(f"[Warning] Metadata file not found at {META_PATH}")
-        return []
-
-    # Load index and metadata
-    index = faiss.read_index(INDEX_PATH)
-    with open(META_PATH, "rb") as f:
-        metadata = pickle.load(f)
-
-    if len(metadata) == 0:
-        print("[Warning] Metadata is empty")
-        return []
-
-    # Encode query
-    query_vec = model.encode([f"{city} real estate infrastructure growth"])
-    query_vec = query_vec.astype("float32")  # FAISS requires float32
-
-    # Perform FAISS search
-    search_k = min(k * 3, len(metadata))
-    _, idxs = index.search(query_vec, search_k)
-
-    docs = []
-    for i in idxs[0]:
-        if i >= len(metadata):
-            continue
-        meta_city = metadata[i].get("city", "")
-        if meta_city and city.lower() in meta_city.lower():  # partial match
-            docs.append(metadata[i])
-            if len(docs) == k:
-                break
-
-    print(f"[Info] Retrieved {len(docs)} documents for city: {city}")
-    return docs
\ No newline at end of file
+    return retriever.retrieve(city, k)
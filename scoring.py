@@ -0,0 +1,115 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+
+from predictor import (
+    DATA_PATH,
+    build_model_inputs,
+    get_price_grid,
+    lookup_price_grid,
+    predict_price_per_sqft_batch
+)
+
+# -----------------------------
+# Chunked, memory-bounded scoring
+# -----------------------------
+# Large listing feeds are read SCORING_CHUNK_ROWS at a time; each chunk is
+# filtered, scored in one model call and cut down to its own top N, and
+# only a running top N is kept across chunks. Peak memory is about one
+# chunk per worker plus N rows, whatever the dataset size.
+SCORING_CHUNK_ROWS = int(os.getenv("SCORING_CHUNK_ROWS", 100_000))
+SCORING_TOP_N = int(os.getenv("SCORING_TOP_N", 1000))
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", 0))   # 0 → score chunks in-process
+# Datasets at least this large are streamed instead of loaded whole
+STREAM_MIN_BYTES = int(os.getenv("STREAM_MIN_BYTES", 64 * 1024 * 1024))
+
+
+def use_streaming(path=DATA_PATH):
+    return os.path.getsize(path) >= STREAM_MIN_BYTES
+
+
+def grid_prices(size, path=DATA_PATH):
+    """
+    Precomputed price-per-sqft for every row of the dataset at `size`, or
+    None (off-grid size, stale grid, or a dataset the grid wasn't built on)
+    """
+    if path != DATA_PATH:
+        return None
+    return lookup_price_grid(get_price_grid(), size)
+
+
+def score_chunk(chunk, size, max_total_cr, top_n, prices=None,
+                city=None, max_metro_km=None, min_ppsf=None):
+    """
+    The `top_n` cheapest listings of `chunk` that pass the filters and cost
+    at most `max_total_cr` at `size`, with Predicted_PPSF and
+    Predicted_Total_Cr columns, cheapest first (ties in row order).
+
+    `prices` is price-per-sqft aligned with the chunk's rows (from the
+    price grid); without it the model scores the filtered rows.
+    The chunk itself is never modified.
+    """
+    mask = np.ones(len(chunk), dtype=bool)
+    if city:
+        mask &= (chunk["City"].str.lower() == city.lower()).to_numpy()
+    if max_metro_km is not None:
+        mask &= (chunk["Distance_to_metro_km"] <= max_metro_km).to_numpy()
+    candidates = chunk[mask]
+
+    if prices is not None:
+        ppsf = np.asarray(prices)[mask]
+    else:
+        ppsf = np.asarray(predict_price_per_sqft_batch(build_model_inputs(candidates, size)))
+    total = ppsf * size / 1e7  # → Cr
+
+    keep = total <= max_total_cr
+    if min_ppsf is not None:
+        keep &= ppsf >= min_ppsf
+
+    scored = candidates[keep].assign(Predicted_PPSF=ppsf[keep], Predicted_Total_Cr=total[keep])
+    return scored.nsmallest(top_n, "Predicted_Total_Cr", keep="first")
+
+
+def _merge_top(best, part, top_n):
+    if best is None:
+        return part
+    # Row order first, so ties resolve the same whichever chunk finished first
+    merged = pd.concat([best, part]).sort_index(kind="stable")
+    return merged.nsmallest(top_n, "Predicted_Total_Cr", keep="first")
+
+
+def top_candidates(size, max_total_cr, top_n=SCORING_TOP_N, path=DATA_PATH,
+                   chunk_rows=SCORING_CHUNK_ROWS, workers=SCORING_WORKERS, **filters):
+    """
+    score_chunk over the whole dataset, read `chunk_rows` rows at a time.
+    With `workers` > 0 chunks are scored in a process pool, at most two
+    chunks per worker in flight.
+    """
+    prices = grid_prices(size, path)
+
+    def tasks():
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            chunk_prices = None if prices is None else prices[chunk.index.to_numpy()]
+            yield (chunk, size, max_total_cr, top_n, chunk_prices)
+
+    best = None
+    if workers <= 0:
+        for args in tasks():
+            best = _merge_top(best, score_chunk(*args, **filters), top_n)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for args in tasks():
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        best = _merge_top(best, future.result(), top_n)
+                pending.add(pool.submit(score_chunk, *args, **filters))
+            for future in pending:
+                best = _merge_top(best, future.result(), top_n)
+
+    if best is None:
+        return pd.DataFrame([])
+    return best
@@ -0,0 +1,163 @@
+import os
+import json
+import numpy as np
+import faiss
+
+# -----------------------------
+# FAISS index specs (shared by the build and the retriever)
+# -----------------------------
+# Specs are faiss.index_factory strings, e.g.
+#   "Flat"           exact brute-force scan (default)
+#   "IVF4096,Flat"   inverted lists over trained centroids, probe `nprobe` lists
+#   "HNSW32"         graph search, `efSearch` candidates per query
+#   "IVF4096,PQ48"   IVF with product-quantized (compressed) vectors
+#   "HNSW32,PQ48"    HNSW over PQ codes
+#
+# Only index families whose search honours an IDSelector are accepted,
+# because retrieval is always city-scoped.
+
+DEFAULT_SPEC = "Flat"
+DEFAULT_NPROBE = 32
+DEFAULT_EF_SEARCH = 128
+TRAIN_SIZE = 100_000  # max vectors sampled to train IVF centroids / PQ codebooks
+PQ_MIN_TRAIN = 256    # one training vector per PQ centroid at 8 bits
+
+
+def unwrap(index):
+    # Look through OPQ/PCA pre-transforms to the index doing the search
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexPreTransform):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def index_kind(index):
+    """
+    "flat", "ivf" or "hnsw"; None for families without filtered search
+    """
+    if faiss.try_extract_index_ivf(index) is not None:
+        return "ivf"
+    inner = unwrap(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexFlat):
+        return "flat"
+    return None
+
+
+def make_index(spec, dim, metric=faiss.METRIC_INNER_PRODUCT):
+    index = faiss.index_factory(dim, spec, metric)
+    if index_kind(index) is None:
+        raise ValueError(
+            f"Index spec {spec!r} does not support city-filtered search "
+            "(use Flat, IVF* or HNSW* specs)"
+        )
+    return index
+
+
+def min_train_rows(spec, index):
+    """
+    Smallest corpus the spec can be trained on
+    """
+    if index.is_trained:
+        return 0
+    ivf = faiss.try_extract_index_ivf(index)
+    rows = ivf.nlist if ivf is not None else 0
+    if "PQ" in spec:
+        rows = max(rows, PQ_MIN_TRAIN)
+    return rows
+
+
+def check_spec(spec, dim, n_rows):
+    """
+    Fail before embedding when the spec cannot be built for this corpus
+    """
+    index = make_index(spec, dim)
+    need = min_train_rows(spec, index)
+    if n_rows < need:
+        raise ValueError(
+            f"Index spec {spec!r} needs at least {need} vectors to train, "
+            f"corpus has {n_rows} (use a smaller nlist or Flat)"
+        )
+
+
+def train_sample(vectors, size=TRAIN_SIZE, seed=0):
+    if len(vectors) <= size:
+        return np.ascontiguousarray(vectors[:])
+    rows = np.sort(np.random.default_rng(seed).choice(len(vectors), size, replace=False))
+    return np.ascontiguousarray(vectors[rows])
+
+
+def build_index(spec, vectors, batch_size=1024, metric=faiss.METRIC_INNER_PRODUCT):
+    """
+    Build a `spec` index over `vectors` (an array or a memory-mapped .npy),
+    training on a sample first when the spec needs it
+    """
+    check_spec(spec, vectors.shape[1], len(vectors))
+    index = make_index(spec, vectors.shape[1], metric)
+    if not index.is_trained:
+        sample = train_sample(vectors)
+        print(f"🔹 Training {spec} on {len(sample)} vectors...")
+        index.train(sample)
+    for start in range(0, len(vectors), batch_size):
+        index.add(np.ascontiguousarray(vectors[start:start + batch_size]))
+    return index
+
+# -----------------------------
+# Search parameters
+# -----------------------------
+def default_search_params(index, nprobe=None, ef_search=None):
+    """
+    Search parameters worth recording for this index
+    """
+    kind = index_kind(index)
+    if kind == "ivf":
+        nlist = faiss.try_extract_index_ivf(index).nlist
+        return {"nprobe": min(nprobe or DEFAULT_NPROBE, nlist)}
+    if kind == "hnsw":
+        return {"efSearch": ef_search or DEFAULT_EF_SEARCH}
+    return {}
+
+
+def search_parameters(index, kind, search_params, selector, widen=False):
+    """
+    SearchParameters for a city-scoped query. `widen` trades speed for
+    recall when the filtered ANN search returned fewer than k hits.
+    """
+    if kind == "ivf":
+        nlist = faiss.try_extract_index_ivf(index).nlist
+        nprobe = nlist if widen else search_params.get("nprobe", DEFAULT_NPROBE)
+        return faiss.SearchParametersIVF(sel=selector, nprobe=min(nprobe, nlist))
+    if kind == "hnsw":
+        ef = search_params.get("efSearch", DEFAULT_EF_SEARCH)
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=ef * 8 if widen else ef)
+    return faiss.SearchParameters(sel=selector)
+
+# -----------------------------
+# Spec file (written next to faiss.index)
+# -----------------------------
+def index_info(spec, index, search_params):
+    return {
+        "spec": spec,
+        "kind": index_kind(index),
+        "metric": "inner_product" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "l2",
+        "dim": index.d,
+        "ntotal": index.ntotal,
+        "search_params": search_params
+    }
+
+
+def write_index_info(path, info):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def read_index_info(path):
+    """
+    Recorded spec, or the Flat defaults of builds that predate spec files
+    """
+    if not os.path.exists(path):
+        return {"spec": DEFAULT_SPEC, "search_params": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -1,69 +1,147 @@
 import os
 import json
-import pickle
+import hashlib
+import argparse
+from itertools import chain
 import numpy as np
-from pypdf import PdfReader
 from sentence_transformers import SentenceTransformer
 import faiss
 
+from pdf_loader import extract_pdf_text, extract_pdfs
+from metadata_store import ColumnarMetadataWriter, load_metadata
+from dedup import (
+    Deduplicator, config as dedup_config, dedup_report, exact_hash, normalize,
+    print_dedup_report
+)
+from ann_index import (
+    DEFAULT_SPEC, build_index, check_spec, default_search_params,
+    index_info, index_kind, write_index_info
+)
+
 # -----------------------------
 # Paths
 # -----------------------------
 PDF_DIR = "data/pdfs"              # PDFs per city (folders: Hyderabad, Bengaluru, Pune)
 TXT_DIR = "data/unstructured"      # .txt/.md files organized by city folder
-CHUNKS_PATH = "data/processed/text_chunks.json"
+CHUNKS_PATH = "data/processed/text_chunks.jsonl"  # one chunk per line
 VECTOR_DIR = "vector_store"
 EMBED_PATH = os.path.join(VECTOR_DIR, "embeddings.npy")
-META_PATH = os.path.join(VECTOR_DIR, "metadata.pkl")
+META_PATH = os.path.join(VECTOR_DIR, "metadata.bin")
+LEGACY_META_PATH = os.path.join(VECTOR_DIR, "metadata.pkl")  # read-only fallback
 FAISS_INDEX_PATH = os.path.join(VECTOR_DIR, "faiss.index")
+INDEX_SPEC_PATH = os.path.join(VECTOR_DIR, "index_spec.json")  # spec + search params
+QUERY_EMBED_PATH = os.path.join(VECTOR_DIR, "query_embeddings.npz")
+SIGNATURES_PATH = os.path.join(VECTOR_DIR, "minhash.npy")  # dedup signature per index row
+MANIFEST_PATH = os.path.join(VECTOR_DIR, "manifest.json")
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+# Must match retriever.QUERY_TEMPLATE
+QUERY_TEMPLATE = "{city} real estate infrastructure growth"
+
+CHUNK_MAX_LEN = 500
+CHUNK_OVERLAP = 50
+EMBED_BATCH_SIZE = 1024  # chunks encoded / added to FAISS at a time
+MANIFEST_VERSION = 2  # 2: rows list every file collapsed into them
 
 os.makedirs(VECTOR_DIR, exist_ok=True)
 os.makedirs(os.path.dirname(CHUNKS_PATH), exist_ok=True)
 
+# -----------------------------
+# Source discovery
+# -----------------------------
+def scan_sources(base_pdf_dir=PDF_DIR, base_txt_dir=TXT_DIR):
+    """
+    Every indexable file as {key, kind, city, source, path}.
+    `key` is stable across builds and identifies the file in the manifest.
+    """
+    sources = []
+
+    if os.path.isdir(base_pdf_dir):
+        for city in sorted(os.listdir(base_pdf_dir)):
+            city_path = os.path.join(base_pdf_dir, city)
+            if not os.path.isdir(city_path):
+                continue
+            for file in sorted(os.listdir(city_path)):
+                if file.endswith(".pdf"):
+                    path = os.path.join(city_path, file)
+                    sources.append({
+                        "key": f"pdf:{city}/{file}",
+                        "kind": "pdf",
+                        "city": city,
+                        "source": file,
+                        "path": path
+                    })
+
+    for root, _, files in sorted(os.walk(base_txt_dir)):
+        city = os.path.basename(root)  # infer city from folder name
+        for file in sorted(files):
+            if file.endswith(".txt") or file.endswith(".md"):
+                full_path = os.path.join(root, file)
+                source = os.path.relpath(full_path, base_txt_dir)
+                sources.append({
+                    "key": f"txt:{source}",
+                    "kind": "txt",
+                    "city": city,  # assign city from folder
+                    "source": source,
+                    "path": full_path
+                })
+
+    return sources
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 # -----------------------------
 # Load PDFs
 # -----------------------------
-def load_pdfs(base_pdf_dir):
+def load_pdfs(base_pdf_dir, workers=None):
+    sources = {src["path"]: src for src in scan_sources(base_pdf_dir, base_txt_dir="")}
     docs = []
-    for city in os.listdir(base_pdf_dir):
-        city_path = os.path.join(base_pdf_dir, city)
-        if not os.path.isdir(city_path):
-            continue
-        for file in os.listdir(city_path):
-            if file.endswith(".pdf"):
-                reader = PdfReader(os.path.join(city_path, file))
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() or ""
-                docs.append({
-                    "city": city,
-                    "source": file,
-                    "text": text
-                })
+    for path, text in extract_pdfs(sources, workers):
+        docs.append({
+            "city": sources[path]["city"],
+            "source": sources[path]["source"],
+            "text": text
+        })
     return docs
 
 # -----------------------------
 # Load text files
 # -----------------------------
+def load_text_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
 def load_text_files(base_dir):
     docs = []
-    for root, _, files in os.walk(base_dir):
-        city = os.path.basename(root)  # infer city from folder name
-        for file in files:
-            if file.endswith(".txt") or file.endswith(".md"):
-                full_path = os.path.join(root, file)
-                with open(full_path, "r", encoding="utf-8") as f:
-                    docs.append({
-                        "city": city,  # assign city from folder
-                        "source": os.path.relpath(full_path, base_dir),
-                        "text": f.read()
-                    })
+    for src in scan_sources(base_pdf_dir="", base_txt_dir=base_dir):
+        docs.append({
+            "city": src["city"],
+            "source": src["source"],
+            "text": load_text_file(src["path"])
+        })
     return docs
 
+
+def load_source(src):
+    if src["kind"] == "pdf":
+        return extract_pdf_text(src["path"])
+    return load_text_file(src["path"])
+
 # -----------------------------
 # Chunking function with optional overlap
 # -----------------------------
-def chunk_text(text, max_len=500, overlap=50):
+def chunk_text(text, max_len=CHUNK_MAX_LEN, overlap=CHUNK_OVERLAP):
     words = text.split()
     chunks = []
     start = 0
@@ -73,64 +151,526 @@ def chunk_text(text, max_len=500, overlap=50):
         start += max_len - overlap
     return chunks
 
+
+def make_chunks(src, text):
+    return [
+        {"city": src["city"], "source": src["source"], "text": c}
+        for c in chunk_text(text)
+    ]
+
+
+def chunk_source(src):
+    """
+    Extract + chunk one file into metadata dicts
+    """
+    return make_chunks(src, load_source(src))
+
+
+def iter_chunked_sources(sources, workers=None):
+    """
+    Yield (source, chunk dicts) per file as soon as it is chunked.
+    PDFs are extracted in a process pool and chunked as each one finishes.
+    """
+    pdfs = {src["path"]: src for src in sources if src["kind"] == "pdf"}
+    for path, text in extract_pdfs(pdfs, workers):
+        src = pdfs[path]
+        file_chunks = make_chunks(src, text)
+        print(f"📄 Extracted {src['source']} → {len(file_chunks)} chunks")
+        yield src, file_chunks
+
+    for src in sources:
+        if src["kind"] != "pdf":
+            yield src, chunk_source(src)
+
+
+def chunk_sources(sources, workers=None):
+    """
+    Extract + chunk many files: key → chunk dicts
+    """
+    return {src["key"]: chunks for src, chunks in iter_chunked_sources(sources, workers)}
+
 # -----------------------------
-# Main pipeline
+# Streaming chunk store (JSONL)
 # -----------------------------
-if __name__ == "__main__":
-    print("🔹 Loading PDFs and text files...")
-    pdf_docs = load_pdfs(PDF_DIR)
-    txt_docs = load_text_files(TXT_DIR)
+def iter_jsonl_batches(path, batch_size=EMBED_BATCH_SIZE):
+    batch = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            batch.append(json.loads(line))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def save_chunks_jsonl(chunks):
+    with open(CHUNKS_PATH + ".tmp", "w", encoding="utf-8") as f:
+        for c in chunks:
+            f.write(json.dumps(c, ensure_ascii=False) + "\n")
+    os.replace(CHUNKS_PATH + ".tmp", CHUNKS_PATH)
+    print(f"✅ Chunks saved to {CHUNKS_PATH}")
+
+# -----------------------------
+# Embedding
+# -----------------------------
+_model = None
+
+
+def get_model():
+    # Only loaded when something actually needs embedding
+    global _model
+    if _model is None:
+        _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+
+def embedding_dim():
+    return get_model().get_sentence_embedding_dimension()
+
+
+def embed_texts(texts, show_progress_bar=True):
+    if not texts:
+        return np.zeros((0, embedding_dim()), dtype="float32")
+    embeddings = get_model().encode(texts, show_progress_bar=show_progress_bar)
+    embeddings = np.array(embeddings).astype("float32")  # Ensure float32
+
+    # Normalize for cosine similarity
+    faiss.normalize_L2(embeddings)
+    return embeddings
+
+# -----------------------------
+# Manifest
+# -----------------------------
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    expected = {
+        "version": MANIFEST_VERSION,
+        "model": MODEL_NAME,
+        "chunk_max_len": CHUNK_MAX_LEN,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "dedup": dedup_config()
+    }
+    for key, value in expected.items():
+        if manifest.get(key) != value:
+            print(f"⚠️ Manifest {key} changed ({manifest.get(key)} → {value}), full rebuild needed")
+            return None
+    return manifest
+
+
+def make_manifest(files, rows, index_meta):
+    """
+    files:      key → {hash, city, source}
+    rows:       one {files, hash} per index row, in index order. `files`
+                has the file of every chunk collapsed into the row, the
+                file of the stored (representative) chunk first.
+    index_meta: spec + search params of the FAISS index (see ann_index.index_info)
+    """
+    return {
+        "version": MANIFEST_VERSION,
+        "model": MODEL_NAME,
+        "chunk_max_len": CHUNK_MAX_LEN,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "dedup": dedup_config(),
+        "dedup_report": dedup_report(rows, files),
+        "index": index_meta,
+        "files": files,
+        "rows": rows
+    }
+
+
+def row_sources(row, files):
+    # Distinct source names a row stands for, representative first
+    return list(dict.fromkeys(files[key]["source"] for key in row["files"]))
+
+
+def manifest_index(manifest):
+    # Builds that predate index specs always used IndexFlatIP
+    return manifest.get("index") or {"spec": DEFAULT_SPEC, "search_params": {}}
+
+# -----------------------------
+# Save artifacts
+# -----------------------------
+def open_embeddings_memmap(n_rows, dim):
+    """
+    Preallocated float32 .npy on disk, filled batch by batch
+    """
+    return np.lib.format.open_memmap(
+        EMBED_PATH + ".tmp", mode="w+", dtype="float32", shape=(n_rows, dim)
+    )
+
 
-    all_docs = pdf_docs + txt_docs
-    print(f"📄 Total documents loaded: {len(all_docs)}")
+def commit_embeddings(memmap):
+    memmap.flush()
+    os.replace(EMBED_PATH + ".tmp", EMBED_PATH)
 
+
+def save_index(index, index_meta):
+    # Write to a temp file and swap: the retriever hot-reloads these artifacts
+    faiss.write_index(index, FAISS_INDEX_PATH + ".tmp")
+    os.replace(FAISS_INDEX_PATH + ".tmp", FAISS_INDEX_PATH)
+    print(f"✅ FAISS index saved to {FAISS_INDEX_PATH} ({index.ntotal} vectors)")
+
+    save_index_spec(index_meta)
+
+
+def save_index_spec(index_meta):
+    # Read by retriever.py to pick the search parameters (nprobe / efSearch)
+    write_index_info(INDEX_SPEC_PATH, index_meta)
+    print(f"✅ Index spec saved to {INDEX_SPEC_PATH} "
+          f"({index_meta['spec']}, {index_meta['search_params']})")
+
+
+def save_manifest(manifest):
+    with open(MANIFEST_PATH + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(MANIFEST_PATH + ".tmp", MANIFEST_PATH)
+    print(f"✅ Manifest saved to {MANIFEST_PATH}")
+
+
+def save_signatures(signatures):
+    with open(SIGNATURES_PATH + ".tmp", "wb") as f:
+        np.save(f, signatures)
+    os.replace(SIGNATURES_PATH + ".tmp", SIGNATURES_PATH)
+
+
+def save_artifacts(index, metadata_writer, signatures, manifest):
+    save_index(index, manifest["index"])
+    save_signatures(signatures)
+
+    metadata_writer.close()
+    print(f"✅ Metadata saved to {META_PATH} ({len(metadata_writer)} chunks)")
+
+    # Manifest last: it only describes artifacts that are fully written
+    save_manifest(manifest)
+
+
+def save_query_embeddings(cities):
     # -----------------------------
-    # Split into chunks
+    # Precompute templated city query embeddings
     # -----------------------------
-    chunks = []
-    for doc in all_docs:
-        for c in chunk_text(doc["text"]):
-            chunks.append({
-                "city": doc["city"],
-                "source": doc["source"],
-                "text": c
-            })
-
-    print(f"📝 Total chunks created: {len(chunks)}")
-
-    # Save chunks JSON
-    with open(CHUNKS_PATH, "w", encoding="utf-8") as f:
-        json.dump(chunks, f, ensure_ascii=False, indent=2)
-    print(f"✅ Chunks saved to {CHUNKS_PATH}")
+    queries = [QUERY_TEMPLATE.format(city=city) for city in cities]
+    query_vecs = np.array(get_model().encode(queries)).astype("float32")
+    with open(QUERY_EMBED_PATH + ".tmp", "wb") as f:
+        np.savez(
+            f,
+            model=np.array(MODEL_NAME),
+            queries=np.array(queries),
+            vectors=query_vecs
+        )
+    os.replace(QUERY_EMBED_PATH + ".tmp", QUERY_EMBED_PATH)
+    print(f"✅ Query embeddings for {len(cities)} cities saved to {QUERY_EMBED_PATH}")
+
+
+def query_embeddings_current(cities):
+    if not os.path.exists(QUERY_EMBED_PATH):
+        return False
+    with np.load(QUERY_EMBED_PATH) as data:
+        stored = data["queries"].tolist()
+    return stored == [QUERY_TEMPLATE.format(city=city) for city in cities]
+
+# -----------------------------
+# Full build
+# -----------------------------
+def full_build(sources, workers=None, batch_size=EMBED_BATCH_SIZE,
+               spec=DEFAULT_SPEC, nprobe=None, ef_search=None):
+    """
+    Streaming build: each file's chunks are deduplicated as it is chunked
+    and unique chunks are appended to a staging JSONL, then read back in
+    batches that are embedded into a preallocated memory-mapped .npy. The
+    `spec` index is then trained (IVF/PQ) and filled from that file.
+    Embedding memory is bounded by the batch size, not the corpus.
+    """
+    print(f"📄 Total documents found: {len(sources)}")
 
     # -----------------------------
-    # Create embeddings
+    # Split into chunks + deduplicate (unique chunks streamed to JSONL)
     # -----------------------------
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    texts = [c["text"] for c in chunks]
+    files = {}
+    rows = []
+    dedup = Deduplicator()
+    stage_path = CHUNKS_PATH + ".stage"
+    with open(stage_path, "w", encoding="utf-8") as f:
+        for src, file_chunks in iter_chunked_sources(sources, workers):
+            for c in file_chunks:
+                row, is_new = dedup.add(c["city"], c["text"])
+                if is_new:
+                    f.write(json.dumps(c, ensure_ascii=False) + "\n")
+                    rows.append({"files": [src["key"]], "hash": text_hash(c["text"])})
+                else:
+                    rows[row]["files"].append(src["key"])
+            files[src["key"]] = {
+                "hash": file_hash(src["path"]),
+                "city": src["city"],
+                "source": src["source"]
+            }
+
+    n_chunks = sum(len(row["files"]) for row in rows)
+    print(f"📝 Total chunks created: {n_chunks} ({len(rows)} after deduplication)")
+    print_dedup_report(dedup_report(rows, files), dedup)
+
+    # -----------------------------
+    # Create embeddings, batch by batch
+    # -----------------------------
+    dim = embedding_dim()
+    check_spec(spec, dim, len(rows))  # before spending time on embeddings
+    embeddings = open_embeddings_memmap(len(rows), dim)
+
+    metadata = ColumnarMetadataWriter(META_PATH)
+    cities = set()
+    done = 0
     print("🔹 Encoding embeddings...")
-    embeddings = model.encode(texts, show_progress_bar=True)
-    embeddings = np.array(embeddings).astype("float32")  # Ensure float32
+    with open(CHUNKS_PATH + ".tmp", "w", encoding="utf-8") as f:
+        for batch in iter_jsonl_batches(stage_path, batch_size):
+            # Sources are only complete once every file has been deduplicated
+            for c, row in zip(batch, rows[done:done + len(batch)]):
+                c["sources"] = row_sources(row, files)
+                f.write(json.dumps(c, ensure_ascii=False) + "\n")
 
-    # Normalize for cosine similarity
-    faiss.normalize_L2(embeddings)
+            vecs = embed_texts([c["text"] for c in batch], show_progress_bar=False)
+            embeddings[done:done + len(batch)] = vecs
+            done += len(batch)
 
-    # Save embeddings
-    np.save(EMBED_PATH, embeddings)
+            metadata.extend(batch)
+            cities.update(c["city"] for c in batch)
+            print(f"   {done}/{len(rows)} chunks embedded")
+    os.replace(CHUNKS_PATH + ".tmp", CHUNKS_PATH)
+    os.remove(stage_path)
+    print(f"✅ Chunks saved to {CHUNKS_PATH}")
 
     # -----------------------------
-    # Build FAISS index
+    # Build FAISS index (inner product on normalized vectors = cosine)
     # -----------------------------
-    index = faiss.IndexFlatIP(embeddings.shape[1])  # Cosine similarity
-    index.add(embeddings)
-    faiss.write_index(index, FAISS_INDEX_PATH)
-    print(f"✅ FAISS index saved to {FAISS_INDEX_PATH}")
+    embeddings.flush()
+    index = build_index(spec, embeddings, batch_size)
+    index_meta = index_info(spec, index, default_search_params(index, nprobe, ef_search))
+
+    commit_embeddings(embeddings)
+    save_artifacts(index, metadata, dedup.signature_matrix(), make_manifest(files, rows, index_meta))
+    save_query_embeddings(sorted(cities))
+
+# -----------------------------
+# Incremental build
+# -----------------------------
+def incremental_build(sources, manifest, workers=None, spec=None, nprobe=None, ef_search=None):
+    """
+    Re-extract, re-chunk and re-embed only new or changed files, drop
+    vectors of deleted files, and update the existing index in place.
+    Chunks whose text is already embedded anywhere in the store reuse
+    the stored vector. New chunks are deduplicated against the stored
+    rows using their saved MinHash signatures.
+
+    Only Flat indexes are updated in place. IVF/HNSW indexes (HNSW cannot
+    remove vectors at all), and any index whose spec changed, are rebuilt
+    from the stored embeddings; nothing unchanged is re-embedded.
+    """
+    old_index = manifest_index(manifest)
+    old_params = old_index["search_params"]
+    spec = spec or old_index["spec"]
+    respec = spec != old_index["spec"]
+    if not respec:
+        # Keep recorded search params unless overridden
+        nprobe = nprobe or old_params.get("nprobe")
+        ef_search = ef_search or old_params.get("efSearch")
+    reparam = (nprobe, ef_search) != (old_params.get("nprobe"), old_params.get("efSearch"))
+
+    old_files = manifest["files"]
+    current = {src["key"]: src for src in sources}
+
+    current_hashes = {key: file_hash(src["path"]) for key, src in current.items()}
+    changed = [key for key in current if old_files.get(key, {}).get("hash") != current_hashes[key]]
+    deleted = [key for key in old_files if key not in current]
+
+    print(f"🔹 Incremental build: {len(changed)} new/changed, {len(deleted)} deleted, "
+          f"{len(current) - len(changed)} unchanged")
+
+    if not changed and not deleted and not respec and not reparam:
+        print("🎉 Vector store already up to date")
+        return
+
+    index = faiss.read_index(FAISS_INDEX_PATH)
+    embeddings = np.load(EMBED_PATH, mmap_mode="r")
+    chunks = load_metadata(META_PATH if os.path.exists(META_PATH) else LEGACY_META_PATH)
+    signatures = np.load(SIGNATURES_PATH, mmap_mode="r") if os.path.exists(SIGNATURES_PATH) else []
+    rows = manifest["rows"]
+
+    if not (index.ntotal == len(embeddings) == len(chunks) == len(signatures) == len(rows)):
+        print("⚠️ Vector store artifacts are out of sync with the manifest, full rebuild")
+        full_build(sources, workers, spec=spec, nprobe=nprobe, ef_search=ef_search)
+        return
+
+    if not changed and not deleted:
+        # Only the index spec or its search params changed
+        if respec:
+            print(f"🔹 Index spec changed ({old_index['spec']} → {spec}), "
+                  "rebuilding index from stored embeddings")
+            index = build_index(spec, embeddings)
+            manifest["index"] = index_info(spec, index, default_search_params(index, nprobe, ef_search))
+            save_index(index, manifest["index"])
+        else:
+            manifest["index"] = index_info(spec, index, default_search_params(index, nprobe, ef_search))
+            save_index_spec(manifest["index"])
+        save_manifest(manifest)
+        return
+
+    # Existing vectors by chunk-text hash, for reuse
+    stale = set(changed) | set(deleted)
+    known = {}
+    for pos, row in enumerate(rows):
+        known.setdefault(row["hash"], pos)
+
+    # Rows whose stored chunk came from a stale file are dropped. Unchanged
+    # files that were collapsed into them are re-chunked too, so their
+    # chunks get a row of their own (or join another one).
+    redo = set(stale)
+    while True:
+        orphaned = {key for row in rows if row["files"][0] in redo for key in row["files"]} - redo
+        if not orphaned:
+            break
+        redo |= orphaned
+    reprocess = [key for key in current if key in redo]
+
+    keep = np.array([row["files"][0] not in redo for row in rows], dtype=bool)
+    kept_rows = np.flatnonzero(keep)
+    remove = np.flatnonzero(~keep).astype("int64")
 
     # -----------------------------
-    # Save metadata
+    # Extract + chunk + deduplicate changed files only
+    # -----------------------------
+    dedup = Deduplicator()
+    updated_rows = []
+    for pos in kept_rows:
+        row = rows[pos]
+        chunk = chunks[int(pos)]
+        dedup.add_row(chunk["city"], exact_hash(normalize(chunk["text"])), np.asarray(signatures[pos]))
+        updated_rows.append({"files": [key for key in row["files"] if key not in redo],
+                             "hash": row["hash"]})
+
+    chunked = chunk_sources([current[key] for key in reprocess], workers)
+
+    new_chunks = []
+    for key in reprocess:
+        for c in chunked[key]:
+            row, is_new = dedup.add(c["city"], c["text"])
+            if is_new:
+                new_chunks.append(c)
+                updated_rows.append({"files": [key], "hash": text_hash(c["text"])})
+            else:
+                updated_rows[row]["files"].append(key)
+    new_rows = updated_rows[len(kept_rows):]
+
+    to_embed = [i for i, row in enumerate(new_rows) if row["hash"] not in known]
+    print(f"📝 {sum(len(chunked[key]) for key in reprocess)} chunks from {len(reprocess)} files, "
+          f"{len(new_chunks)} after deduplication, "
+          f"{len(new_chunks) - len(to_embed)} reused, {len(to_embed)} to embed")
+
+    new_embeddings = np.zeros((len(new_chunks), embeddings.shape[1]), dtype="float32")
+    for i, row in enumerate(new_rows):
+        if row["hash"] in known:
+            new_embeddings[i] = embeddings[known[row["hash"]]]
+    if to_embed:
+        print("🔹 Encoding embeddings...")
+        new_embeddings[to_embed] = embed_texts([new_chunks[i]["text"] for i in to_embed])
+
     # -----------------------------
-    with open(META_PATH, "wb") as f:
-        pickle.dump(chunks, f)
-    print(f"✅ Metadata saved to {META_PATH}")
+    # Update index in place (Flat only)
+    # -----------------------------
+    in_place = not respec and index_kind(index) == "flat"
+    if in_place:
+        if len(remove):
+            # IndexFlat compacts on removal, matching the order of `keep`
+            index.remove_ids(faiss.IDSelectorBatch(remove))
+        index.add(new_embeddings)
+
+    # Copy surviving rows into a new memory-mapped file, batch by batch
+    updated = open_embeddings_memmap(len(kept_rows) + len(new_chunks), embeddings.shape[1])
+    for start in range(0, len(kept_rows), EMBED_BATCH_SIZE):
+        batch = kept_rows[start:start + EMBED_BATCH_SIZE]
+        updated[start:start + len(batch)] = embeddings[batch]
+    updated[len(kept_rows):] = new_embeddings
+    del embeddings
+
+    if not in_place:
+        # IVF ids don't compact on removal and HNSW can't remove:
+        # rebuild from the updated stored vectors instead
+        print(f"🔹 Rebuilding {spec} index from stored embeddings")
+        updated.flush()
+        index = build_index(spec, updated)
+    index_meta = index_info(spec, index, default_search_params(index, nprobe, ef_search))
+    commit_embeddings(updated)
+
+    files = {key: info for key, info in old_files.items() if key not in stale}
+    for key in changed:
+        src = current[key]
+        files[key] = {"hash": current_hashes[key], "city": src["city"], "source": src["source"]}
+    rows = updated_rows
+
+    def store_chunks():
+        # Every row's chunk with its (possibly changed) source references
+        stored = chain((chunks[int(pos)] for pos in kept_rows), new_chunks)
+        for chunk, row in zip(stored, rows):
+            yield dict(chunk, sources=row_sources(row, files))
+
+    metadata = ColumnarMetadataWriter(META_PATH)
+    metadata.extend(store_chunks())
+
+    print(f"🔹 Removed {len(remove)} vectors, added {len(new_chunks)}")
+    print_dedup_report(dedup_report(rows, files), dedup)
+    save_chunks_jsonl(store_chunks())
+    save_artifacts(index, metadata, dedup.signature_matrix(), make_manifest(files, rows, index_meta))
+
+    cities = sorted({files[row["files"][0]]["city"] for row in rows})
+    if not query_embeddings_current(cities):
+        save_query_embeddings(cities)
+
+# -----------------------------
+# Main pipeline
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the FAISS vector store")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only re-embed new/changed files (falls back to a full build without a manifest)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=EMBED_BATCH_SIZE,
+        help="chunks embedded and added to the index per batch"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="processes for PDF extraction (default: all cores, 1 = serial)"
+    )
+    parser.add_argument(
+        "--index", default=None,
+        help="FAISS index_factory spec: Flat (default), IVF4096,Flat, HNSW32, "
+             "IVF4096,PQ48, ... (incremental builds keep the recorded spec)"
+    )
+    parser.add_argument(
+        "--nprobe", type=int, default=None,
+        help="inverted lists probed per query for IVF indexes"
+    )
+    parser.add_argument(
+        "--ef-search", type=int, default=None,
+        help="candidate list size per query for HNSW indexes"
+    )
+    args = parser.parse_args()
+
+    print("🔹 Scanning PDFs and text files...")
+    sources = scan_sources()
+
+    manifest = load_manifest() if args.incremental else None
+    if args.incremental and manifest is None:
+        print("⚠️ No usable manifest, running a full build")
+
+    if manifest is None:
+        full_build(sources, args.workers, args.batch_size,
+                   args.index or DEFAULT_SPEC, args.nprobe, args.ef_search)
+    else:
+        incremental_build(sources, manifest, args.workers,
+                          args.index, args.nprobe, args.ef_search)
 
-    print("🎉 Vector store ready for querying!")
\ No newline at end of file
+    print("🎉 Vector store ready for querying!")
@@ -0,0 +1,151 @@
+import re
+import zlib
+import hashlib
+import numpy as np
+
+# -----------------------------
+# Chunk deduplication (exact + MinHash near-duplicates)
+# -----------------------------
+# Text is normalized (lowercase, punctuation dropped, digits masked so
+# years and figures don't make chunks distinct) and shingled into word
+# bigrams. Exact duplicates are caught by hash; near duplicates by MinHash
+# signatures bucketed with LSH, then confirmed on estimated Jaccard.
+# Chunks are only compared within the same city: retrieval is city-scoped.
+
+NUM_PERM = 64
+BANDS = 16            # 16 bands x 4 rows: pairs above ~0.5 Jaccard become candidates
+SHINGLE_SIZE = 2      # word bigrams
+THRESHOLD = 0.7       # estimated Jaccard at or above which chunks are merged
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_PUNCT = re.compile(r"[^\w\s]")
+_DIGITS = re.compile(r"\d+")
+
+
+def config():
+    # Recorded in the build manifest: changing any of these needs a full rebuild
+    return {
+        "num_perm": NUM_PERM,
+        "bands": BANDS,
+        "shingle_size": SHINGLE_SIZE,
+        "threshold": THRESHOLD
+    }
+
+
+def normalize(text):
+    return _DIGITS.sub("0", _PUNCT.sub(" ", text.lower())).split()
+
+
+def exact_hash(tokens):
+    return hashlib.sha256(" ".join(tokens).encode("utf-8")).hexdigest()
+
+
+def minhash(tokens):
+    shingles = {
+        " ".join(tokens[i:i + SHINGLE_SIZE])
+        for i in range(max(len(tokens) - SHINGLE_SIZE + 1, 1))
+    }
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)
+    ) % _PRIME
+    # (a * x + b) mod p per permutation; fits in uint64 since a, x < 2^31
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+class Deduplicator:
+    """
+    Streaming duplicate detector. add() returns the row a chunk collapses
+    into; rows are numbered in the order unique chunks are first seen.
+    """
+
+    def __init__(self, threshold=THRESHOLD):
+        self.threshold = threshold
+        self.signatures = []  # one MinHash signature per row
+        self._exact = {}      # (city, exact hash) → row
+        self._buckets = {}    # (city, band, band values) → rows
+
+        self.exact = 0
+        self.near = 0
+
+    def _band_keys(self, city, signature):
+        rows = NUM_PERM // BANDS
+        for band in range(BANDS):
+            yield (city, band, signature[band * rows:(band + 1) * rows].tobytes())
+
+    def add_row(self, city, key, signature):
+        """
+        Register a unique chunk (also used to seed from an existing store)
+        """
+        row = len(self.signatures)
+        self.signatures.append(signature)
+        self._exact.setdefault((city, key), row)
+        for band_key in self._band_keys(city, signature):
+            self._buckets.setdefault(band_key, []).append(row)
+        return row
+
+    def find(self, city, key, signature):
+        row = self._exact.get((city, key))
+        if row is not None:
+            return row, "exact"
+
+        seen = set()
+        for band_key in self._band_keys(city, signature):
+            for row in self._buckets.get(band_key, ()):
+                if row in seen:
+                    continue
+                seen.add(row)
+                if np.mean(self.signatures[row] == signature) >= self.threshold:
+                    return row, "near"
+        return None, None
+
+    def add(self, city, text):
+        """
+        (row, is_new) for one chunk
+        """
+        tokens = normalize(text)
+        key = exact_hash(tokens)
+        signature = minhash(tokens)
+
+        row, kind = self.find(city, key, signature)
+        if kind == "exact":
+            self.exact += 1
+        elif kind == "near":
+            self.near += 1
+        else:
+            return self.add_row(city, key, signature), True
+        return row, False
+
+    def signature_matrix(self):
+        if not self.signatures:
+            return np.zeros((0, NUM_PERM), dtype=np.uint32)
+        return np.vstack(self.signatures)
+
+
+def dedup_report(rows, files):
+    """
+    Per-city {chunks, vectors, ratio} from manifest rows, where each row
+    lists the file of every chunk collapsed into it
+    """
+    report = {}
+    for row in rows:
+        city = files[row["files"][0]]["city"]
+        stats = report.setdefault(city, {"chunks": 0, "vectors": 0})
+        stats["chunks"] += len(row["files"])
+        stats["vectors"] += 1
+    for stats in report.values():
+        stats["ratio"] = 1 - stats["vectors"] / stats["chunks"]
+    return report
+
+
+def print_dedup_report(report, dedup=None):
+    print("🔹 Deduplication by city:")
+    for city in sorted(report):
+        stats = report[city]
+        print(f"   {city}: {stats['chunks']} chunks → {stats['vectors']} vectors "
+              f"({stats['ratio']:.1%} removed)")
+    if dedup is not None:
+        print(f"   this run: {dedup.exact} exact, {dedup.near} near duplicates collapsed")
@@ -0,0 +1,223 @@
+import os
+import json
+import mmap
+import pickle
+import struct
+import numpy as np
+
+# -----------------------------
+# Columnar chunk metadata (single file, memory-mapped)
+# -----------------------------
+# Layout:
+#   magic (8 bytes) | header length (uint64) | header JSON | padding to 8
+#   offsets      int64[n + 1]  byte offsets into the text section
+#   city_codes   int32[n]      index into header["cities"]
+#   source_codes int32[n]      index into header["sources"]
+#   ref_offsets  int64[n + 1]  ranges into ref_codes, per row
+#   ref_codes    int32[m]      every source a deduplicated row stands for
+#   text         utf-8 bytes, all chunk texts concatenated
+#
+# Section positions (relative to the end of the header) are stored in the
+# header. Lookups by FAISS id are O(1) and every process mapping the file
+# shares the same pages.
+
+MAGIC = b"GMMETA01"
+ALIGN = 8
+
+
+def _align(pos):
+    return (pos + ALIGN - 1) // ALIGN * ALIGN
+
+
+class ColumnarMetadataWriter:
+    """
+    Streaming writer: chunk texts go straight to a temp file, only the
+    small per-row columns are kept in memory until close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._text_path = path + ".text.tmp"
+        self._text = open(self._text_path, "wb")
+        self._offsets = [0]
+        self._city_codes = []
+        self._source_codes = []
+        self._ref_offsets = [0]
+        self._ref_codes = []
+        self._cities = {}
+        self._sources = {}
+
+    def _code(self, table, value):
+        if value not in table:
+            table[value] = len(table)
+        return table[value]
+
+    def append(self, chunk):
+        data = chunk["text"].encode("utf-8")
+        self._text.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+        self._city_codes.append(self._code(self._cities, chunk.get("city", "")))
+        self._source_codes.append(self._code(self._sources, chunk.get("source", "")))
+        # Deduplicated chunks carry all sources they were collapsed from
+        for source in chunk.get("sources") or [chunk.get("source", "")]:
+            self._ref_codes.append(self._code(self._sources, source))
+        self._ref_offsets.append(len(self._ref_codes))
+
+    def extend(self, chunks):
+        for chunk in chunks:
+            self.append(chunk)
+
+    def __len__(self):
+        return len(self._city_codes)
+
+    def close(self):
+        self._text.close()
+
+        offsets = np.array(self._offsets, dtype="int64")
+        city_codes = np.array(self._city_codes, dtype="int32")
+        source_codes = np.array(self._source_codes, dtype="int32")
+        ref_offsets = np.array(self._ref_offsets, dtype="int64")
+        ref_codes = np.array(self._ref_codes, dtype="int32")
+
+        # Section positions are relative to the (aligned) end of the header
+        columns = (("offsets", offsets), ("city_codes", city_codes),
+                   ("source_codes", source_codes), ("ref_offsets", ref_offsets),
+                   ("ref_codes", ref_codes))
+        sections = {}
+        pos = 0
+        for name, arr in columns:
+            sections[name] = pos
+            pos = _align(pos + arr.nbytes)
+        sections["text"] = pos
+
+        header_bytes = json.dumps({
+            "count": len(city_codes),
+            "cities": list(self._cities),
+            "sources": list(self._sources),
+            "sections": sections
+        }).encode("utf-8")
+        data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            for name, arr in columns:
+                f.write(b"\0" * (data_start + sections[name] - f.tell()))
+                f.write(arr.tobytes())
+            f.write(b"\0" * (data_start + sections["text"] - f.tell()))
+            with open(self._text_path, "rb") as text:
+                for block in iter(lambda: text.read(1 << 20), b""):
+                    f.write(block)
+
+        os.remove(self._text_path)
+        # Swap in atomically: the retriever hot-reloads this file
+        os.replace(tmp_path, self.path)
+
+
+def write_metadata(chunks, path):
+    writer = ColumnarMetadataWriter(path)
+    writer.extend(chunks)
+    writer.close()
+
+
+class ColumnarMetadata:
+    """
+    Read-only, memory-mapped view of a columnar metadata file.
+    Behaves like a list of {"city", "source", "sources", "text"} dicts.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a columnar metadata file: {path}")
+        (header_len,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self._mm[start:start + header_len])
+
+        n = header["count"]
+        data_start = _align(start + header_len)
+        sections = {name: data_start + pos for name, pos in header["sections"].items()}
+        self.cities = header["cities"]
+        self.sources = header["sources"]
+        self.offsets = np.frombuffer(self._mm, dtype="int64", count=n + 1,
+                                     offset=sections["offsets"])
+        self.city_codes = np.frombuffer(self._mm, dtype="int32", count=n,
+                                        offset=sections["city_codes"])
+        self.source_codes = np.frombuffer(self._mm, dtype="int32", count=n,
+                                          offset=sections["source_codes"])
+        self._text_start = sections["text"]
+
+        if "ref_offsets" in sections:
+            self.ref_offsets = np.frombuffer(self._mm, dtype="int64", count=n + 1,
+                                             offset=sections["ref_offsets"])
+            self.ref_codes = np.frombuffer(self._mm, dtype="int32",
+                                           count=int(self.ref_offsets[-1]),
+                                           offset=sections["ref_codes"])
+        else:
+            # Files written before deduplication: one source per row
+            self.ref_offsets = np.arange(n + 1, dtype="int64")
+            self.ref_codes = self.source_codes
+
+    def __len__(self):
+        return len(self.city_codes)
+
+    def text(self, i):
+        start = self._text_start + int(self.offsets[i])
+        end = self._text_start + int(self.offsets[i + 1])
+        return self._mm[start:end].decode("utf-8")
+
+    def sources_of(self, i):
+        codes = self.ref_codes[self.ref_offsets[i]:self.ref_offsets[i + 1]]
+        return [self.sources[c] for c in codes]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return {
+            "city": self.cities[self.city_codes[i]],
+            "source": self.sources[self.source_codes[i]],
+            "sources": self.sources_of(i),
+            "text": self.text(i)
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def city_ids(self, city):
+        """
+        Row ids whose city contains `city` (case-insensitive, partial match)
+        """
+        codes = [c for c, name in enumerate(self.cities)
+                 if name and city.lower() in name.lower()]
+        return np.flatnonzero(np.isin(self.city_codes, codes)).astype("int64")
+
+
+class PickleMetadata(list):
+    """
+    Reader shim for legacy metadata.pkl stores (a pickled list of dicts)
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            super().__init__(pickle.load(f))
+        self.path = path
+
+    def city_ids(self, city):
+        return np.array([
+            i for i, meta in enumerate(self)
+            if meta.get("city") and city.lower() in meta["city"].lower()  # partial match
+        ], dtype="int64")
+
+
+def load_metadata(path):
+    if path.endswith(".pkl"):
+        return PickleMetadata(path)
+    return ColumnarMetadata(path)
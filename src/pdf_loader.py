@@ -1,8 +1,78 @@
 from pypdf import PdfReader
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import os
 
-def load_all_city_pdfs(base_pdf_dir):
+# PDFs longer than this are split into page ranges across workers
+PAGES_PER_TASK = 32
+
+
+def extract_page_range(path, start, end):
+    """
+    Text of pages [start, end) of one PDF (runs in a worker process)
+    """
+    reader = PdfReader(path)
+    parts = [reader.pages[i].extract_text() or "" for i in range(start, end)]
+    return "".join(parts)
+
+
+def extract_pdf_text(path):
+    reader = PdfReader(path)
+    return "".join(page.extract_text() or "" for page in reader.pages)
+
+
+def plan_tasks(paths, pages_per_task=PAGES_PER_TASK):
+    """
+    Split every PDF into (path, start, end) page ranges.
+    Returns (tasks, page counts by path).
+    """
+    tasks = []
+    page_counts = {}
+    for path in paths:
+        n_pages = len(PdfReader(path).pages)
+        page_counts[path] = n_pages
+        for start in range(0, max(n_pages, 1), pages_per_task):
+            tasks.append((path, start, min(start + pages_per_task, n_pages)))
+    return tasks, page_counts
+
+
+def extract_pdfs(paths, workers=None, pages_per_task=PAGES_PER_TASK):
+    """
+    Yield (path, text) for each PDF as soon as all of its pages are extracted.
+
+    Files — and page ranges of long files — are spread over a process pool.
+    With workers=1 everything runs in-process.
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(paths) == 0:
+        for path in paths:
+            yield path, extract_pdf_text(path)
+        return
+
+    tasks, _ = plan_tasks(paths, pages_per_task)
+    remaining = {}
+    for path, _, _ in tasks:
+        remaining[path] = remaining.get(path, 0) + 1
+    parts = {path: {} for path in paths}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(extract_page_range, path, start, end): (path, start)
+            for path, start, end in tasks
+        }
+        for future in as_completed(futures):
+            path, start = futures[future]
+            parts[path][start] = future.result()
+            remaining[path] -= 1
+            if remaining[path] == 0:
+                pieces = parts.pop(path)
+                yield path, "".join(pieces[s] for s in sorted(pieces))
+
+
+def load_all_city_pdfs(base_pdf_dir, workers=None):
     documents = []
+    files = []
 
     for city in os.listdir(base_pdf_dir):
         city_path = os.path.join(base_pdf_dir, city)
@@ -10,23 +80,23 @@ def load_all_city_pdfs(base_pdf_dir):
         if not os.path.isdir(city_path):
             continue
 
-        print(f"\n📂 Loading PDFs for city: {city}")
+        print(f"\n📂 Found PDFs for city: {city}")
 
         for file in os.listdir(city_path):
             if file.endswith(".pdf"):
-                print(f"   📄 Loading PDF: {file}")
+                files.append((os.path.join(city_path, file), city, file))
 
-                reader = PdfReader(os.path.join(city_path, file))
-                text = ""
+    by_path = {path: (city, file) for path, city, file in files}
 
-                for page in reader.pages:
-                    text += page.extract_text() or ""
+    for path, text in extract_pdfs(by_path, workers):
+        city, file = by_path[path]
+        print(f"   📄 Loaded PDF: {city}/{file}")
 
-                documents.append({
-                    "city": city,
-                    "source": file,
-                    "text": text
-                })
+        documents.append({
+            "city": city,
+            "source": file,
+            "text": text
+        })
 
     print(f"\n✅ Total PDFs loaded across all cities: {len(documents)}")
     return documents
@@ -35,4 +105,4 @@ def load_all_city_pdfs(base_pdf_dir):
 # Run directly for testing
 if __name__ == "__main__":
     pdf_base_dir = "data/pdfs"
-    load_all_city_pdfs(pdf_base_dir)
\ No newline at end of file
+    load_all_city_pdfs(pdf_base_dir)
@@ -2,13 +2,15 @@ from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
 
+from ann_index import DEFAULT_SPEC, build_index
+
 model = SentenceTransformer("all-MiniLM-L6-v2")
 
-def build_vector_store(docs):
+def build_vector_store(docs, spec=DEFAULT_SPEC):
     texts = [d["text"] for d in docs]
-    embeddings = model.encode(texts)
+    embeddings = np.array(model.encode(texts)).astype("float32")
 
-    index = faiss.IndexFlatL2(embeddings.shape[1])
-    index.add(np.array(embeddings))
+    # spec: FAISS index_factory string, see ann_index.py
+    index = build_index(spec, embeddings, metric=faiss.METRIC_L2)
 
-    return index, texts
\ No newline at end of file
+    return index, texts
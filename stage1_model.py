@@ -1,11 +1,15 @@
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import os
+import argparse
 import joblib
 
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+from price_grid import build_price_grid
+from compiled_model import export_compiled_model
+
+from training import load_encoded_split, train_candidates, scoring_latency_ms
+from model_search import run_search, SEARCH_BUDGET_SEC, LATENCY_TARGET_MS
+
 from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.ensemble import RandomForestRegressor
 
@@ -16,6 +20,18 @@ try:
 except ImportError:
     XGBOOST_AVAILABLE = False
 
+# -----------------------
+# Options
+# -----------------------
+parser = argparse.ArgumentParser(description="Train and compare price-per-sqft models")
+parser.add_argument("--search", action="store_true",
+                    help="also run the successive-halving search over Random Forest / XGBoost")
+parser.add_argument("--budget", type=float, default=SEARCH_BUDGET_SEC,
+                    help="wall-clock budget for --search in seconds, finalist refits included")
+parser.add_argument("--latency-ms", type=float, default=LATENCY_TARGET_MS,
+                    help="max ms to score one request's listings for the saved best model")
+args = parser.parse_args()
+
 # -----------------------
 # Paths
 # -----------------------
@@ -27,29 +43,10 @@ os.makedirs(MODEL_DIR, exist_ok=True)
 os.makedirs(FIG_PATH, exist_ok=True)
 
 # -----------------------
-# Load data
+# Encoded train/test split (cached on disk, see training.py)
 # -----------------------
-df = pd.read_csv(DATA_PATH)
-print("Data loaded:", df.shape)
-
-# -----------------------
-# Features / Target
-# -----------------------
-X = df.drop(columns=[
-    "Price_per_sqft",
-    "Total_Price_Cr",
-    "Estimated_Monthly_Rent"
-])
-y = df["Price_per_sqft"]
-
-X = pd.get_dummies(X, drop_first=True)
-
-# -----------------------
-# Train-test split
-# -----------------------
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
+X_train, X_test, y_train, y_test, split_path = load_encoded_split(DATA_PATH)
+print("Features:", X_train.shape[1], "| train:", len(X_train), "| test:", len(X_test))
 
 # -----------------------
 # Models to compare
@@ -75,35 +72,30 @@ if XGBOOST_AVAILABLE:
     )
 
 # -----------------------
-# Train & Evaluate
+# Train & Evaluate (candidates in parallel, n_jobs split across cores)
 # -----------------------
-results = []
-
-for name, model in models.items():
-    print(f"\nTraining {name}...")
-    model.fit(X_train, y_train)
+results = train_candidates(models, split_path, MODEL_DIR)
 
-    y_pred = model.predict(X_test)
-
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-    mae = mean_absolute_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
-
-    results.append({
-        "Model": name,
-        "RMSE": rmse,
-        "MAE": mae,
-        "R2": r2
-    })
+if args.search:
+    results += run_search(
+        X_train, y_train, X_test, y_test, MODEL_DIR,
+        budget_sec=args.budget, latency_target_ms=args.latency_ms
+    )
 
-    joblib.dump(model, f"{MODEL_DIR}/{name}.pkl")
+# -----------------------
+# Serving latency (one request scores every listing)
+# -----------------------
+X_all = pd.concat([X_train, X_test])
+for row in results:
+    row["Latency_ms"] = scoring_latency_ms(joblib.load(f"{MODEL_DIR}/{row['Model']}.pkl"), X_all)
+    row["Meets_Latency"] = row["Latency_ms"] <= args.latency_ms
 
 # -----------------------
 # Results DataFrame
 # -----------------------
 results_df = pd.DataFrame(results).sort_values("R2", ascending=False)
 print("\nModel Comparison:")
-print(results_df)
+print(results_df.to_string(index=False))
 
 results_df.to_csv("reports/model_comparison.csv", index=False)
 
@@ -122,10 +114,29 @@ plt.close()
 # -----------------------
 # Select & save best model
 # -----------------------
-best_model_name = results_df.iloc[0]["Model"]
+# Most accurate model within the latency target (fastest if none is)
+eligible = results_df[results_df["Meets_Latency"]]
+if eligible.empty:
+    print(f"[Warning] No model scores a request within {args.latency_ms} ms, keeping the fastest")
+    best_model_name = results_df.sort_values("Latency_ms").iloc[0]["Model"]
+else:
+    best_model_name = eligible.iloc[0]["Model"]
 best_model = joblib.load(f"{MODEL_DIR}/{best_model_name}.pkl")
 
 joblib.dump(best_model, f"{MODEL_DIR}/best_price_model.pkl")
 
 print(f"\nBest model selected: {best_model_name}")
-print("Saved as models/best_price_model.pkl")
\ No newline at end of file
+print("Saved as models/best_price_model.pkl")
+
+# -----------------------
+# Compile for serving (NumPy-only, parity-checked)
+# -----------------------
+try:
+    export_compiled_model()
+except ValueError as e:
+    print(f"[Warning] Model not compiled, serving will unpickle it: {e}")
+
+# -----------------------
+# Materialize price grid
+# -----------------------
+build_price_grid()
@@ -0,0 +1,143 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from predictor import get_model, model_loaded
+from retriever import retriever, get_encoder, encoder_loaded
+from llm import get_client, client_loaded
+from listings import load_listings, listings_loaded
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# -----------------------------
+# Import-time profile
+# -----------------------------
+def profile_imports(module="app"):
+    """
+    Import `module` in a fresh interpreter under `python -X importtime` and
+    sum the self time per top-level package.
+    Returns (total_ms, [(package, ms), ...] slowest first).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    per_package = {}
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        package = name.strip().split(".")[0]
+        per_package[package] = per_package.get(package, 0.0) + int(self_us) / 1000
+        if name.strip() == module:
+            total_ms = int(cumulative_us) / 1000
+
+    return total_ms, sorted(per_package.items(), key=lambda item: -item[1])
+
+
+def print_import_profile(module="app", top=20):
+    total_ms, packages = profile_imports(module)
+    print(f"🔹 import {module}: {total_ms:.0f} ms")
+    for package, ms in packages[:top]:
+        print(f"   {package:<28} {ms:>8.1f} ms")
+
+
+# -----------------------------
+# Warm-up + readiness
+# -----------------------------
+def _load_index():
+    if retriever.warm_up() is None:
+        raise RuntimeError("Vector store not found")
+
+
+# name → (load, is_loaded). Loads are idempotent and thread-safe, so a
+# request that arrives mid warm-up just waits on the same lock
+COMPONENTS = {
+    "model": (get_model, model_loaded),
+    "listings": (load_listings, listings_loaded),
+    "index": (_load_index, lambda: retriever.loaded),
+    "encoder": (get_encoder, encoder_loaded),
+    "llm_client": (get_client, client_loaded)
+}
+
+
+class Warmup:
+    """
+    Preloads the heavy components on demand (/warmup, `app.py --warmup`).
+
+    Liveness only needs the process to answer; readiness needs every
+    component loaded, whether by a warm-up or lazily by earlier requests.
+    """
+
+    def __init__(self, components=COMPONENTS):
+        self.components = components
+
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.load_times = {}
+        self.errors = {}
+
+    def run(self, names=None):
+        """
+        Load the named components (all by default); returns status()
+        """
+        for name in names or self.components:
+            load, is_loaded = self.components[name]
+            if is_loaded():
+                continue
+
+            start = time.perf_counter()
+            try:
+                load()
+            except Exception as e:
+                print(f"[Warning] Warm-up of {name} failed: {e}")
+                self.errors[name] = str(e)
+                continue
+
+            with self._lock:
+                self.load_times[name] = round(time.perf_counter() - start, 4)
+                self.errors.pop(name, None)
+            print(f"[Info] Warmed up {name} in {self.load_times[name]}s")
+        return self.status()
+
+    def start(self, names=None):
+        """
+        Warm up on a background thread (the server keeps serving meanwhile)
+        """
+        thread = threading.Thread(target=self.run, args=(names,), name="warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def ready(self):
+        return all(is_loaded() for _, is_loaded in self.components.values())
+
+    def status(self):
+        return {
+            "ready": self.ready(),
+            "uptime_sec": round(time.time() - self.started_at, 3),
+            "components": {
+                name: {
+                    "loaded": is_loaded(),
+                    "load_sec": self.load_times.get(name),
+                    "error": self.errors.get(name)
+                }
+                for name, (_, is_loaded) in self.components.items()
+            }
+        }
+
+
+# One per process, shared by app.py routes and the CLI flag
+warmup = Warmup()
+
+
+if __name__ == "__main__":
+    print_import_profile(sys.argv[1] if len(sys.argv) > 1 else "app")
@@ -1,5 +1,6 @@
 let selectedCity = null;
 let selectedMetro = "Yes"; // default
+let downloadUrl = null;     // set when a report finishes
 
 // City selection
 document.querySelectorAll(".city-btn").forEach(btn => {
@@ -32,8 +33,9 @@ async function generateReport() {
   document.getElementById("status").innerText = "Generating analysis...";
   document.getElementById("output").innerText = "";
   document.getElementById("downloadPdfBtn").disabled = true;
+  downloadUrl = null;
 
-  const res = await fetch("/generate", {
+  const res = await fetch("/generate/stream", {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({
@@ -45,13 +47,53 @@ async function generateReport() {
     })
   });
 
-  const data = await res.json();
+  // Server-sent events: progress, LLM tokens, then a final "done"
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
 
-  document.getElementById("output").innerText = data.analysis;
-  document.getElementById("status").innerText = "Analysis ready ✔";
-  document.getElementById("downloadPdfBtn").disabled = false;
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      handleEvent(raw);
+    }
+  }
+}
+
+function handleEvent(raw) {
+  let event = "message";
+  let data = "";
+  raw.split("\n").forEach(line => {
+    if (line.startsWith("event: ")) event = line.slice(7);
+    else if (line.startsWith("data: ")) data += line.slice(6);
+  });
+  const payload = data ? JSON.parse(data) : {};
+
+  const status = document.getElementById("status");
+  const output = document.getElementById("output");
+
+  if (event === "ml_done") {
+    status.innerText = `Scored properties (${payload.rows} in budget)...`;
+  } else if (event === "docs_retrieved") {
+    status.innerText = "Writing analysis...";
+  } else if (event === "token") {
+    output.innerText += payload.text;
+  } else if (event === "done") {
+    output.innerText = payload.analysis;
+    downloadUrl = payload.download_url;
+    status.innerText = "Analysis ready ✔";
+    document.getElementById("downloadPdfBtn").disabled = false;
+  } else if (event === "error") {
+    status.innerText = payload.message;
+  }
 }
 
 function downloadPDF() {
-  window.location.href = "/download";
+  if (downloadUrl) window.location.href = downloadUrl;
 }
\ No newline at end of file
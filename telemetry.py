@@ -0,0 +1,196 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# -----------------------------
+# Request ids + structured logs
+# -----------------------------
+# The request id lives in a context variable: app.py sets it per HTTP
+# request, and the job queue / stage pool run their work inside a copy of
+# the submitting context, so every span of a report carries the same id.
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+LOG_SPANS = os.getenv("LOG_SPANS", "1") == "1"
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+
+def set_request_id(request_id):
+    _request_id.set(request_id)
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+def log_event(event, **fields):
+    """
+    One JSON log line: {"ts", "event", "request_id", ...fields}
+    """
+    record = {"ts": round(time.time(), 3), "event": event, "request_id": get_request_id()}
+    record.update(fields)
+    print(json.dumps(record, default=str), flush=True)
+
+
+# -----------------------------
+# Metrics (Prometheus text format)
+# -----------------------------
+# Seconds; sub-millisecond model scoring up to multi-second LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+
+def _label_str(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        for _, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, value=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}   # label values → [bucket counts..., sum, count]
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _label_str(self.labels, key, [("le", _format_value(bound))])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _label_str(self.labels, key, [("le", "+Inf")])
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{_label_str(self.labels, key)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """
+    Read at scrape time from `fn` (a number, or {label value: number}
+    for a single label). `type="counter"` exposes a running total kept
+    elsewhere (e.g. JobQueue.completed).
+    """
+
+    def __init__(self, name, help, fn, label=None, type="gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.label = label
+        self.type = type
+        _registry.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        value = self.fn()
+        if self.label is None:
+            lines.append(f"{self.name} {_format_value(value)}")
+        else:
+            for key, v in sorted(value.items()):
+                lines.append(f"{self.name}{_label_str((self.label,), (key,))} {_format_value(v)}")
+        return lines
+
+
+def render_metrics():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# Spans
+# -----------------------------
+STAGE_SECONDS = Histogram(
+    "golden_mile_stage_seconds", "Latency of pipeline stages", ["stage"]
+)
+STAGE_ERRORS = Counter(
+    "golden_mile_stage_errors_total", "Pipeline stages that raised", ["stage"]
+)
+
+
+@contextmanager
+def span(stage, **fields):
+    """
+    Time a block into golden_mile_stage_seconds{stage} and log it.
+    Yields the field dict so the block can attach results (rows, tokens).
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield fields
+    except GeneratorExit:
+        # The consuming generator was closed mid-block (client disconnected)
+        status = "cancelled"
+        raise
+    except Exception:
+        status = "error"
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=stage)
+        if LOG_SPANS:
+            log_event("span", stage=stage, duration_ms=round(duration * 1000, 3),
+                      status=status, **fields)
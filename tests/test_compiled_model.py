@@ -0,0 +1,63 @@
+import joblib
+import numpy as np
+import pytest
+
+from compiled_model import CompiledModel, ServingModel, compile_model, load_compiled_model
+from predictor import DATA_PATH, MODEL_PATH
+from price_grid import file_hash
+from training import load_encoded_split
+
+
+@pytest.fixture(scope="module")
+def native():
+    return joblib.load(MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def X_train(native, tmp_path_factory):
+    X_train, _, _, _, _ = load_encoded_split(DATA_PATH, cache_dir=str(tmp_path_factory.mktemp("features")))
+    return X_train.reindex(columns=native.feature_names_in_, fill_value=0)
+
+
+def assert_parity(expected, actual):
+    np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-2)
+
+
+def test_compiled_matches_native_on_training_split(native, X_train):
+    compiled = CompiledModel(compile_model(native))
+    assert_parity(native.predict(X_train), compiled.predict(X_train))
+
+
+def test_shipped_compiled_model_matches_pickle(native, X_train):
+    compiled = load_compiled_model(file_hash(MODEL_PATH))
+    assert compiled is not None, "models/best_price_model.npz is missing or stale"
+    assert_parity(native.predict(X_train), compiled.predict(X_train))
+
+
+def test_missing_values_take_the_native_default_branch(native, X_train):
+    X = X_train.head(200).astype("float64")
+    X.iloc[::3, 0] = np.nan
+    compiled = CompiledModel(compile_model(native))
+    assert_parity(native.predict(X), compiled.predict(X))
+
+
+def test_serving_model_routes_by_batch_size(native, X_train):
+    class Recorder:
+        def __init__(self, model):
+            self.model = model
+            self.calls = 0
+
+        def predict(self, X):
+            self.calls += 1
+            return self.model.predict(X)
+
+    compiled = Recorder(CompiledModel(compile_model(native)))
+    fallback = Recorder(native)
+    compiled.feature_names_in_ = native.feature_names_in_
+    serving = ServingModel(compiled, lambda: fallback, max_rows=100)
+
+    assert_parity(native.predict(X_train.head(100)), serving.predict(X_train.head(100)))
+    assert (compiled.calls, fallback.calls) == (1, 0)
+    assert serving._native is None   # small batches never load the native model
+    assert_parity(native.predict(X_train.head(101)), serving.predict(X_train.head(101)))
+    assert (compiled.calls, fallback.calls) == (1, 1)
@@ -0,0 +1,92 @@
+from functools import lru_cache
+
+import joblib
+import pandas as pd
+import pytest
+
+import predictor
+from predictor import DATA_PATH, MODEL_PATH, predict_properties
+from price_grid import SIZE_BUCKETS
+
+
+@lru_cache(maxsize=1)
+def native_model():
+    return joblib.load(MODEL_PATH)
+
+
+def predict_native(model_input):
+    """
+    The original predict_price_per_sqft: one-row get_dummies + native predict
+    """
+    model = native_model()
+    frame = pd.get_dummies(pd.DataFrame([model_input]))
+    frame = frame.reindex(columns=model.feature_names_in_, fill_value=0)
+    return model.predict(frame)[0]
+
+
+@lru_cache(maxsize=None)
+def rowwise_prices(size):
+    """
+    (row, price per sqft) for every listing, one native model call per row
+    """
+    df = pd.read_csv(DATA_PATH)
+
+    scored = []
+    for _, row in df.iterrows():
+        model_input = {
+            "City": row["City"],
+            "Locality": row["Locality"],
+            "Distance_to_metro_km": row["Distance_to_metro_km"],
+            "Property_Type": row["Property_Type"],
+            "Age_years": row.get("Age_years", 5),
+            "Amenities_score": row.get("Amenities_score", 5),
+            "Size_sqft": size
+        }
+        scored.append((row, predict_native(model_input)))
+    return scored
+
+
+def predict_properties_rowwise(user_inputs):
+    """
+    The original row-by-row implementation, kept as the reference
+    """
+    results = []
+    for row, price_per_sqft in rowwise_prices(user_inputs["size"]):
+        total_price = (price_per_sqft * user_inputs["size"]) / 1e7
+
+        if total_price <= user_inputs["budget"] * 1.25:
+            results.append({
+                "City": row["City"],
+                "Locality": row["Locality"],
+                "Size_sqft": user_inputs["size"],
+                "Predicted_Total_Cr": round(total_price, 2),
+                "Distance_to_metro_km": row["Distance_to_metro_km"]
+            })
+
+    return pd.DataFrame(results)
+
+
+@pytest.mark.parametrize("size, budget", [
+    (1200, 1.0),    # on the price grid
+    (1234, 1.0),    # off the grid: batch model call
+])
+def test_vectorized_matches_rowwise(size, budget):
+    user_inputs = {"city": "Pune", "budget": budget, "size": size, "intent": "Investment"}
+    if size in SIZE_BUCKETS:
+        assert predictor.lookup_price_grid(predictor.get_price_grid(), size) is not None
+
+    expected = predict_properties_rowwise(user_inputs)
+    actual = predict_properties(user_inputs)
+
+    assert 0 < len(expected) < 2550   # the budget filter keeps some, drops some
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+
+def test_empty_result_when_nothing_fits():
+    user_inputs = {"city": "Pune", "budget": 0.01, "size": 1200, "intent": "Investment"}
+
+    expected = predict_properties_rowwise(user_inputs)
+    actual = predict_properties(user_inputs)
+
+    assert expected.empty and actual.empty
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
@@ -0,0 +1,216 @@
+import os
+import time
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+from price_grid import file_hash
+from listings import load_listings
+from compiled_model import CompiledModel, ServingModel, compile_model
+
+# -----------------------
+# Training helpers for stage1_model.py
+# -----------------------
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", "cache/features")
+TRAIN_WORKERS = int(os.getenv("TRAIN_WORKERS", 0))  # 0 → one per core (capped by candidates)
+
+TARGET = "Price_per_sqft"
+# Derived from the target, so never used as features
+LEAKY_COLUMNS = ["Price_per_sqft", "Total_Price_Cr", "Estimated_Monthly_Rent"]
+
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+
+def encode_frame(df):
+    X = df.drop(columns=LEAKY_COLUMNS)
+    return pd.get_dummies(X, drop_first=True)
+
+
+def load_encoded_split(data_path, test_size=TEST_SIZE, random_state=RANDOM_STATE,
+                       cache_dir=FEATURE_CACHE_DIR):
+    """
+    (X_train, X_test, y_train, y_test, cache_path) for the dataset.
+
+    The one-hot encoded split is cached on disk, keyed by the dataset bytes
+    and split parameters, so re-runs and worker processes skip
+    loading + get_dummies.
+    """
+    key = f"{file_hash(data_path)[:16]}_{test_size}_{random_state}"
+    cache_path = os.path.join(cache_dir, f"split_{key}.joblib")
+
+    if os.path.exists(cache_path):
+        print(f"Encoded features loaded from cache: {cache_path}")
+        return (*joblib.load(cache_path), cache_path)
+
+    df = load_listings(data_path)
+    split = train_test_split(
+        encode_frame(df), df[TARGET], test_size=test_size, random_state=random_state
+    )
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    joblib.dump(tuple(split), tmp_path)
+    os.replace(tmp_path, cache_path)
+    print(f"Encoded features cached: {cache_path}")
+    return (*split, cache_path)
+
+
+# -----------------------
+# Peak memory (per worker process)
+# -----------------------
+def _proc_status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return None
+
+
+def _reset_peak_rss():
+    """
+    Reset the kernel's peak-RSS mark (Linux); returns the current RSS in kB,
+    or None when only getrusage's lifetime peak is available
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return _proc_status_kb("VmRSS")
+    except OSError:
+        return None
+
+
+def _peak_mem_mb(start_rss_kb):
+    if start_rss_kb is not None:
+        return (_proc_status_kb("VmHWM") - start_rss_kb) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB on Linux
+
+
+def timed_fit(model, X, y):
+    """
+    Fit the model; returns (wall seconds, peak memory MB of the fit)
+    """
+    start_rss = _reset_peak_rss()
+    start = time.perf_counter()
+    model.fit(X, y)
+    return time.perf_counter() - start, _peak_mem_mb(start_rss)
+
+
+# -----------------------
+# Serving latency
+# -----------------------
+def scoring_latency_ms(model, X, repeats=5):
+    """
+    Median ms to score X the way predictor.py serves the model: small
+    batches through the compiled NumPy form when it compiles, larger ones
+    through model.predict
+    """
+    try:
+        scorer = ServingModel(CompiledModel(compile_model(model)), lambda: model)
+    except ValueError:
+        scorer = model
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        scorer.predict(X)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+# -----------------------
+# Fitting
+# -----------------------
+def is_threaded(model):
+    # Tree ensembles parallelise over trees; the linear models don't use n_jobs for one target
+    return hasattr(model, "n_estimators") and "n_jobs" in model.get_params()
+
+
+def plan_threads(models, cores):
+    """
+    n_jobs per threaded model when all candidates run at once: each
+    single-threaded model keeps one core, threaded ones share the rest
+    """
+    threaded = [name for name, model in models.items() if is_threaded(model)]
+    if not threaded:
+        return {}
+    spare = max(cores - (len(models) - len(threaded)), len(threaded))
+    return {name: max(1, spare // len(threaded)) for name in threaded}
+
+
+def fit_candidate(name, model, split_path, model_dir):
+    """
+    Fit one candidate on the cached split, save it, and return its metrics
+    with fit / predict wall time and peak memory of the fit + predict
+    """
+    X_train, X_test, y_train, y_test = joblib.load(split_path)
+
+    start_rss = _reset_peak_rss()
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_time = time.perf_counter() - start
+
+    peak_mem = _peak_mem_mb(start_rss)
+
+    joblib.dump(model, f"{model_dir}/{name}.pkl")
+
+    return {
+        "Model": name,
+        "RMSE": np.sqrt(mean_squared_error(y_test, y_pred)),
+        "MAE": mean_absolute_error(y_test, y_pred),
+        "R2": r2_score(y_test, y_pred),
+        "Fit_Time_s": fit_time,
+        "Predict_Time_s": predict_time,
+        "Peak_Mem_MB": peak_mem,
+        "n_jobs": model.get_params().get("n_jobs") if is_threaded(model) else 1
+    }
+
+
+def train_candidates(models, split_path, model_dir, workers=TRAIN_WORKERS):
+    """
+    Fit all candidates concurrently, one process each, with n_jobs planned
+    so the total thread count matches the cores. Returns metrics rows.
+    """
+    cores = os.cpu_count() or 1
+    workers = min(workers or cores, len(models))
+
+    if workers > 1:
+        threads = plan_threads(models, cores)
+    else:
+        threads = {name: cores for name, model in models.items() if is_threaded(model)}
+    for name, n_jobs in threads.items():
+        models[name].set_params(n_jobs=n_jobs)
+
+    if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        results = []
+        for name, model in models.items():
+            print(f"\nTraining {name}...")
+            results.append(fit_candidate(name, model, split_path, model_dir))
+        return results
+
+    # Threaded (slowest) candidates first so the quick ones fill in around them.
+    # fork: workers inherit the imports, and stage1_model.py has no __main__ guard
+    order = sorted(models, key=lambda name: not is_threaded(models[name]))
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+        futures = {
+            pool.submit(fit_candidate, name, models[name], split_path, model_dir): name
+            for name in order
+        }
+        print(f"\nTraining {len(models)} models on {workers} workers ({cores} cores)...")
+        for future in as_completed(futures):
+            row = future.result()
+            print(f"   {row['Model']}: R2 {row['R2']:.4f}, fit {row['Fit_Time_s']:.2f}s")
+            results.append(row)
+    return results